@@ -1,17 +1,25 @@
 """Client utilities for interacting with the Akahu API."""
 from __future__ import annotations
 
+import functools
 import logging
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Dict, Iterable, List, Optional
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bank_sync import json_compat
 
 LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AkahuTransaction:
     """Representation of a transaction returned from Akahu."""
 
@@ -25,24 +33,48 @@ class AkahuTransaction:
     source: str
 
     @classmethod
-    def from_payload(cls, payload: Dict, *, source: str, account_name: str = "unknown") -> "AkahuTransaction":
-        """Create an :class:`AkahuTransaction` from an Akahu API payload."""
+    def from_payload(
+        cls,
+        payload: Dict,
+        *,
+        source: str,
+        account_name: str = "unknown",
+        strings: Optional[Dict[str, str]] = None,
+    ) -> "AkahuTransaction":
+        """Create an :class:`AkahuTransaction` from an Akahu API payload.
+
+        When ``strings`` is given, repeated dates, descriptions and merchant
+        names are deduplicated through it so equal values share one object.
+        """
 
         settled_at = payload.get("date") or payload.get("settled_at")
         merchant = payload.get("merchant") or {}
+        date_value = _ensure_iso_date(settled_at)
+        description = payload.get("description", "")
+        merchant_name = merchant.get("name", "").strip() or payload.get("merchant_name", "")
+        if strings is not None:
+            date_value = strings.setdefault(date_value, date_value)
+            description = strings.setdefault(description, description)
+            merchant_name = strings.setdefault(merchant_name, merchant_name)
         return cls(
             id=payload["_id"],
-            date=_ensure_iso_date(settled_at),
+            date=date_value,
             account=account_name,
             amount=float(payload.get("amount", 0)),
             balance=_safe_float(payload.get("balance")),
-            description_raw=payload.get("description", ""),
-            merchant_normalised=merchant.get("name", "").strip() or payload.get("merchant_name", ""),
+            description_raw=description,
+            merchant_normalised=merchant_name,
             source=source,
         )
 
-    def to_row(self, *, category: str, category_type: str, is_transfer: bool, imported_at: datetime) -> List[str]:
-        """Return the row representation expected by Google Sheets."""
+    def to_row(
+        self, *, category: str, category_type: str, is_transfer: bool, imported_at: datetime | str
+    ) -> List[str]:
+        """Return the row representation expected by Google Sheets.
+
+        ``imported_at`` may be passed pre-formatted as an ISO string so a sync
+        can format its timestamp once for every row.
+        """
 
         return [
             self.id,
@@ -56,7 +88,7 @@ class AkahuTransaction:
             category_type,
             str(is_transfer).upper(),
             self.source,
-            imported_at.isoformat(),
+            imported_at if isinstance(imported_at, str) else imported_at.isoformat(),
         ]
 
 
@@ -72,10 +104,35 @@ def _ensure_iso_date(raw: Optional[str]) -> str:
         return date.today().isoformat()
     if len(raw) == 10:
         return raw
+    # Akahu dates are ISO timestamps, whose first ten characters are already
+    # the date; only unusual formats need a full parse.
+    if raw[4:5] == "-" and raw[7:8] == "-" and raw[10:11] in ("T", " "):
+        return raw[:10]
+    # Today's date stays outside the cache so it is never stale
+    return _parse_iso_date(raw) or date.today().isoformat()
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_iso_date(raw: str) -> Optional[str]:
+    # Cached: a feed repeats the same few timestamps across pages.
     try:
         return datetime.fromisoformat(raw).date().isoformat()
     except ValueError:
-        return date.today().isoformat()
+        return None
+
+
+def _build_session() -> requests.Session:
+    """Create a session that keeps connections alive and retries transient failures."""
+
+    retry = Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retry))
+    return session
 
 
 class AkahuClient:
@@ -88,24 +145,66 @@ class AkahuClient:
         app_token: str,
         base_url: str = "https://api.akahu.io/v1",
         session: Optional[requests.Session] = None,
+        cache_path: Optional[Path] = None,
     ) -> None:
         self._user_token = user_token
         self._app_token = app_token
         self._base_url = base_url.rstrip("/")
-        self._session = session or requests.Session()
+        self._session = session or _build_session()
+        self._headers = {
+            "Authorization": f"Bearer {self._user_token}",
+            "X-Akahu-Id": self._app_token,
+            "Accept-Encoding": "gzip, deflate",
+        }
         self._account_map: Optional[Dict[str, str]] = None
+        # Accounts rarely change, so the map is kept on disk between runs and
+        # revalidated with its ETag
+        self._cache_path = cache_path
 
     def _get_account_map(self) -> Dict[str, str]:
         """Fetch accounts and return ID -> name mapping."""
         if self._account_map is None:
-            payload = self._request("GET", "/accounts")
+            etag, cached_map = self._load_account_cache()
+            headers = {"If-None-Match": etag} if etag and cached_map is not None else None
+            response = self._send("GET", "/accounts", headers=headers)
+            if response.status_code == 304 and cached_map is not None:
+                self._account_map = cached_map
+                LOGGER.info("Accounts unchanged, using %d cached accounts", len(cached_map))
+                return self._account_map
+            payload = json_compat.loads(response.content)
             self._account_map = {
-                account["_id"]: account.get("name", "unknown")
+                account["_id"]: sys.intern(account.get("name", "unknown"))
                 for account in payload.get("items", [])
             }
             LOGGER.info("Loaded %d accounts", len(self._account_map))
+            self._save_account_cache(response.headers.get("ETag"), self._account_map)
         return self._account_map
 
+    def _load_account_cache(self) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
+        if self._cache_path is None or not self._cache_path.exists():
+            return None, None
+        try:
+            payload = json_compat.loads(self._cache_path.read_bytes())
+        except (ValueError, OSError):
+            return None, None
+        accounts = payload.get("accounts")
+        if not isinstance(accounts, dict):
+            return None, None
+        return payload.get("etag"), accounts
+
+    def _save_account_cache(self, etag: Optional[str], account_map: Dict[str, str]) -> None:
+        if self._cache_path is None:
+            return
+        if not etag:
+            # Without an ETag the cache could never be revalidated
+            self._cache_path.unlink(missing_ok=True)
+            return
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._cache_path.write_bytes(json_compat.dumps({"etag": etag, "accounts": account_map}))
+        except OSError as exc:
+            LOGGER.warning("Could not write Akahu account cache %s: %s", self._cache_path, exc)
+
     def fetch_settled_transactions(
         self,
         *,
@@ -121,29 +220,47 @@ class AkahuClient:
             "limit": page_size,
             "type": "SETTLED",
         }
-        cursor: Optional[str] = None
-        account_map = self._get_account_map()
-
-        while True:
-            payload = self._request("GET", "/transactions", params={**params, "cursor": cursor} if cursor else params)
-            items = payload.get("items", [])
-            LOGGER.info("Akahu API returned %d items (all settled via type filter)", len(items))
-            for transaction in items:
-                account_id = transaction.get("_account", "")
-                account_name = account_map.get(account_id, "unknown")
-                yield AkahuTransaction.from_payload(transaction, source="akahu_bnz", account_name=account_name)
-
-            cursor = payload.get("cursor", {}).get("next")
-            if not cursor:
-                break
+        # Akahu pages by cursor, so only one page can be requested ahead: fetch
+        # the next page on a worker thread while the current one is consumed.
+        # The first page is also independent of the account lookup, so the two
+        # requests run side by side.
+        # Bank feeds repeat the same dates, descriptions and merchants constantly;
+        # share one string per distinct value for the whole fetch
+        strings: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending: Optional[Future] = executor.submit(self._request, "GET", "/transactions", params=params)
+            account_map = self._get_account_map()
+            while pending is not None:
+                payload = pending.result()
+                cursor = payload.get("cursor", {}).get("next")
+                pending = (
+                    executor.submit(self._request, "GET", "/transactions", params={**params, "cursor": cursor})
+                    if cursor
+                    else None
+                )
+                items = payload.get("items", [])
+                LOGGER.info("Akahu API returned %d items (all settled via type filter)", len(items))
+                for transaction in items:
+                    account_id = transaction.get("_account", "")
+                    account_name = account_map.get(account_id, "unknown")
+                    yield AkahuTransaction.from_payload(
+                        transaction, source="akahu_bnz", account_name=account_name, strings=strings
+                    )
 
     def _request(self, method: str, path: str, *, params: Optional[Dict] = None) -> Dict:
+        return json_compat.loads(self._send(method, path, params=params).content)
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
         url = f"{self._base_url}{path}"
-        headers = {
-            "Authorization": f"Bearer {self._user_token}",
-            "X-Akahu-Id": self._app_token,
-        }
         LOGGER.debug("Akahu request %s %s params=%s", method, url, params)
-        response = self._session.request(method, url, headers=headers, params=params, timeout=30)
+        request_headers = {**self._headers, **headers} if headers else self._headers
+        response = self._session.request(method, url, headers=request_headers, params=params, timeout=30)
         response.raise_for_status()
-        return response.json()
+        return response
@@ -1,53 +1,130 @@
 """Utilities for categorising transactions based on spreadsheet rules."""
 from __future__ import annotations
 
+import functools
+import logging
 import operator
 import re
 from dataclasses import dataclass, field
-from typing import Iterable, List, Optional
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+try:
+    import re2
+except ImportError:  # pragma: no cover - depends on the environment
+    re2 = None
 
-@dataclass(frozen=True)
+from bank_sync.rule_patterns import field_text, fuse_patterns
+
+if TYPE_CHECKING:
+    from bank_sync.akahu_client import AkahuTransaction
+
+# Categorisation works on sheet rows (dicts) and Akahu transactions alike
+Transaction = Union[Mapping[str, Any], "AkahuTransaction"]
+
+LOGGER = logging.getLogger(__name__)
+
+# Keywords that mark a transaction as a transfer between the user's own accounts.
+# They are compiled into one alternation, so adding hints keeps detection to a
+# single scan per field.
+TRANSFER_HINTS = ("internet xfr", "transfer", "internal", "self", "bnz")
+
+
+@dataclass(frozen=True, slots=True)
 class AmountCondition:
     """Represents a numeric constraint (comparison or exact matches)."""
 
     operator_symbol: Optional[str] = None
     threshold: Optional[float] = None
     accepted_values: tuple[float, ...] = ()
+    comparator: Optional[Callable[[float, float], bool]] = field(default=None, init=False, repr=False, compare=False)
+    abs_accepted: frozenset[float] = field(default=frozenset(), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Resolve the operator and absolute values once rather than on every match
+        if self.operator_symbol and self.threshold is not None:
+            object.__setattr__(self, "comparator", _COMPARATORS.get(self.operator_symbol))
+        object.__setattr__(self, "abs_accepted", frozenset(abs(value) for value in self.accepted_values))
 
     def matches(self, amount: Optional[float]) -> bool:
         if amount is None:
             return False
         # Use absolute value so rules don't need to deal with negatives
         abs_amount = abs(amount)
-        if self.accepted_values:
-            return any(abs_amount == abs(value) for value in self.accepted_values)
-        if self.operator_symbol and self.threshold is not None:
-            comparator = _COMPARATORS.get(self.operator_symbol)
-            if not comparator:
-                return False
-            return comparator(abs_amount, abs(self.threshold))
+        if self.abs_accepted:
+            return abs_amount in self.abs_accepted
+        if self.comparator is not None:
+            return self.comparator(abs_amount, abs(self.threshold))
         return False
 
 
-@dataclass(order=True)
+@dataclass(order=True, slots=True)
 class CategoryRule:
     priority: int
     pattern: str
     field: str
     category: str
+    compiled: Pattern[str] = field(compare=False, repr=False)
     category_type: str = field(default="", compare=False)
     amount_condition: AmountCondition | None = field(default=None, compare=False)
+    needle: Optional[str] = field(default=None, compare=False, repr=False)
 
-    def matches(self, transaction: dict) -> bool:
-        target = transaction.get(self.field, "") or ""
-        if not re.search(self.pattern, target, flags=re.IGNORECASE):
+    def matches(self, transaction: Transaction) -> bool:
+        target = field_text(transaction, self.field)
+        if not self.pattern_matches(target, target.casefold()):
             return False
-        if self.amount_condition:
-            amount_value = _coerce_amount(transaction.get("amount"))
-            if not self.amount_condition.matches(amount_value):
-                return False
-        return True
+        return self.amount_matches(_coerce_amount(_field_value(transaction, "amount")) if self.amount_condition else None)
+
+    def pattern_matches(self, target: str, folded: str) -> bool:
+        """Check the pattern against ``target``; ``folded`` is its casefolded form."""
+        # Plain literals skip the regex engine entirely. Only for ASCII text do
+        # casefold() and re.IGNORECASE agree ("İ" matches "i", "ß" not "ss").
+        if self.needle is not None and target.isascii():
+            return self.needle in folded
+        return self.compiled.search(target) is not None
+
+    def amount_matches(self, amount: Optional[float]) -> bool:
+        """Check the amount condition against an already coerced amount."""
+        return self.amount_condition is None or self.amount_condition.matches(amount)
+
+
+class _FieldMatcher:
+    """Finds the highest-priority rule whose pattern matches a single field."""
+
+    def __init__(self, rules: Sequence[Tuple[int, CategoryRule]]):
+        self._rules = rules
+        self._positions = [position for position, _ in rules]
+        self._pattern_set = _build_re2_set(rules)
+        # RE2 folds case differently from re outside ASCII, so other text
+        # still goes through the fused pattern
+        self._fused = fuse_patterns([(position, rule.pattern) for position, rule in rules], in_order=True)
+
+    def first_match(self, target: str, folded: str) -> Optional[int]:
+        """Return the position of the first matching rule, or None."""
+        if self._pattern_set is not None and target.isascii():
+            # RE2 reports every rule that matches in one DFA pass; take the best.
+            matched = self._pattern_set.Match(target)
+            return min(self._positions[index] for index in matched) if matched else None
+        if self._fused is not None:
+            match = self._fused.match(target)
+            return None if match is None else int(match.lastgroup[1:])
+        for position, rule in self._rules:
+            if rule.pattern_matches(target, folded):
+                return position
+        return None
 
 
 class Categoriser:
@@ -61,31 +138,121 @@ class Categoriser:
             pattern = rule.get("pattern", "").strip()
             if not pattern:
                 continue
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error as exc:
+                LOGGER.warning("Skipping category rule with invalid pattern %r: %s", pattern, exc)
+                continue
+            raw_condition = rule.get("amount_condition")
             self._rules.append(
                 CategoryRule(
                     priority=priority,
                     pattern=pattern,
                     field=rule.get("field", "merchant_normalised"),
                     category=rule.get("category", "Uncategorised"),
+                    compiled=compiled,
                     category_type=rule.get("category_type", ""),
-                    amount_condition=_parse_amount_condition(rule.get("amount_condition", "")),
+                    amount_condition=_parse_amount_condition(str(raw_condition) if raw_condition else ""),
+                    needle=pattern.casefold() if pattern.isascii() and _LITERAL_RE.match(pattern) else None,
                 )
             )
         self._rules.sort()
 
-    def categorise(self, transaction: dict) -> tuple[str, str]:
-        """Return (category, category_type) for the transaction."""
-        for rule in self._rules:
-            if rule.matches(transaction):
+        by_field: Dict[str, List[Tuple[int, CategoryRule]]] = {}
+        for position, category_rule in enumerate(self._rules):
+            by_field.setdefault(category_rule.field, []).append((position, category_rule))
+        self._matchers = {field_name: _FieldMatcher(field_rules) for field_name, field_rules in by_field.items()}
+        self._fields = tuple(self._matchers)
+        self._uses_amount = any(category_rule.amount_condition for category_rule in self._rules)
+        # Merchants and descriptions repeat heavily across a feed, so results are
+        # memoised per instance on the field values (and amount, when relevant).
+        self._categorise_values = functools.lru_cache(maxsize=4096)(self._match_values)
+
+    def categorise(self, transaction: Transaction) -> tuple[str, str]:
+        """Return (category, category_type) for the transaction.
+
+        Accepts a sheet-style dict or an object exposing the same fields as
+        attributes, such as :class:`AkahuTransaction`.
+        """
+        values = tuple(field_text(transaction, field_name) for field_name in self._fields)
+        # The amount only joins the cache key when some rule looks at it.
+        amount = _coerce_amount(_field_value(transaction, "amount")) if self._uses_amount else None
+        return self._categorise_values(values, amount)
+
+    def _match_values(self, values: Tuple[str, ...], amount: Optional[float]) -> tuple[str, str]:
+        # Extract and casefold each referenced field once, rather than per rule.
+        targets: Dict[str, Tuple[str, str]] = {
+            field_name: (target, target.casefold()) for field_name, target in zip(self._fields, values)
+        }
+
+        best: Optional[int] = None
+        for field_name, matcher in self._matchers.items():
+            position = matcher.first_match(*targets[field_name])
+            if position is not None and (best is None or position < best):
+                best = position
+        if best is None:
+            return ("Uncategorised", "")
+
+        rule = self._rules[best]
+        if rule.amount_matches(amount):
+            return (rule.category, rule.category_type)
+        # The best pattern match failed its amount condition; no earlier rule
+        # matched, so carry on rule-by-rule from the next one.
+        for rule in islice(self._rules, best + 1, None):
+            if rule.pattern_matches(*targets[rule.field]) and rule.amount_matches(amount):
                 return (rule.category, rule.category_type)
         return ("Uncategorised", "")
 
     @staticmethod
-    def detect_transfer(transaction: dict) -> bool:
-        description = (transaction.get("description_raw") or "").lower()
-        merchant = (transaction.get("merchant_normalised") or "").lower()
-        hints = ["internet xfr", "transfer", "internal", "self", "bnz"]
-        return any(hint in description or hint in merchant for hint in hints)
+    def detect_transfer(transaction: Transaction) -> bool:
+        return _is_transfer(
+            field_text(transaction, "description_raw"),
+            field_text(transaction, "merchant_normalised"),
+        )
+
+
+_TRANSFER_RE = re.compile("|".join(map(re.escape, TRANSFER_HINTS)), re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_transfer(description: str, merchant: str) -> bool:
+    # Cached: bank feeds repeat the same description/merchant pairs constantly.
+    return bool(_TRANSFER_RE.search(description) or _TRANSFER_RE.search(merchant))
+
+
+# Patterns made only of these characters contain no regex syntax (note "."
+# is deliberately excluded, since it is a wildcard).
+_LITERAL_RE = re.compile(r"^[\w \-&']+$")
+
+
+# RE2 reads these differently from Python's re (ASCII-only classes, no \Z,
+# "{,n}" as literal text, POSIX bracket classes, "$" not matching before a
+# trailing newline), so such patterns stay on re.
+_RE2_INCOMPATIBLE_RE = re.compile(r"\\[wWbBdDsSZ]|\{,|\[\[:|\$")
+
+
+def _build_re2_set(rules: Sequence[Tuple[int, CategoryRule]]) -> Optional[Any]:
+    """Compile rule patterns into an RE2 set when google-re2 is installed.
+
+    Returns None if RE2 is unavailable or any pattern is outside the syntax
+    both engines interpret identically (lookarounds, backreferences, ...).
+    """
+    if re2 is None or len(rules) < 2:
+        return None
+    # Non-ASCII patterns are left out too, as RE2 folds their case differently
+    if any(not rule.pattern.isascii() or _RE2_INCOMPATIBLE_RE.search(rule.pattern) for _, rule in rules):
+        return None
+    options = re2.Options()
+    options.case_sensitive = False
+    options.log_errors = False
+    pattern_set = re2.Set.SearchSet(options)
+    try:
+        for _, rule in rules:
+            pattern_set.Add(rule.pattern)
+        pattern_set.Compile()
+    except re2.error:
+        return None
+    return pattern_set
 
 
 _COMPARATORS = {
@@ -97,6 +264,12 @@ _COMPARATORS = {
 }
 
 
+def _field_value(transaction: Transaction, name: str) -> Any:
+    if isinstance(transaction, Mapping):
+        return transaction.get(name)
+    return getattr(transaction, name, None)
+
+
 def _coerce_amount(value: object) -> Optional[float]:
     if value is None:
         return None
@@ -108,32 +281,38 @@ def _coerce_amount(value: object) -> Optional[float]:
         return None
 
 
-def _parse_amount_condition(raw_value: object) -> AmountCondition | None:
+# Wording accepted in amount conditions, and what each phrase is rewritten to
+_AMOUNT_PHRASES = {
+    "greater than or equal to": ">=",
+    "greater than": ">",
+    "more than": ">",
+    "less than or equal to": "<=",
+    "less than": "<",
+    "fewer than": "<",
+    "at least": ">=",
+    "at most": "<=",
+    "no more than": "<=",
+    "no less than": ">=",
+    "equal to": "=",
+    "dollars": "",
+    "dollar": "",
+    "nz$": "$",
+    "nzd": "",
+    ",": "",
+}
+# Longest phrases first, so "no more than" wins over "more than" in one pass
+_AMOUNT_PHRASE_RE = re.compile("|".join(map(re.escape, sorted(_AMOUNT_PHRASES, key=len, reverse=True))))
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_amount_condition(raw_value: str) -> AmountCondition | None:
+    # Cached: many rules share the same condition text and AmountCondition is immutable.
     if not raw_value:
         return None
-    text = str(raw_value).strip()
+    text = raw_value.strip()
     if not text:
         return None
-    normalized = text.lower()
-    replacements = [
-        ("greater than or equal to", ">="),
-        ("greater than", ">"),
-        ("more than", ">"),
-        ("less than or equal to", "<="),
-        ("less than", "<"),
-        ("fewer than", "<"),
-        ("at least", ">="),
-        ("at most", "<="),
-        ("no more than", "<="),
-        ("no less than", ">="),
-        ("equal to", "="),
-    ]
-    for phrase, symbol in replacements:
-        normalized = normalized.replace(phrase, symbol)
-    normalized = normalized.replace("dollars", "").replace("dollar", "")
-    normalized = normalized.replace("nz$", "$")
-    normalized = normalized.replace("nzd", "")
-    normalized = normalized.replace(",", "")
+    normalized = _AMOUNT_PHRASE_RE.sub(lambda match: _AMOUNT_PHRASES[match.group(0)], text.lower())
     normalized = re.sub(r"\s+", " ", normalized).strip()
 
     # Handle exact numeric matches and simple OR combinations.
@@ -3,9 +3,10 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass, field as dataclass_field
-from typing import Iterable, List, Mapping, Optional, Pattern, Sequence
+from typing import Dict, Iterable, List, Mapping, Optional, Pattern, Sequence, Tuple, Union
 
 from bank_sync.akahu_client import AkahuTransaction
+from bank_sync.rule_patterns import field_text, fuse_patterns, required_literal
 
 
 @dataclass
@@ -17,17 +18,26 @@ class IgnoreRule:
     min_amount: Optional[float] = None
     max_amount: Optional[float] = None
     _regex: Pattern[str] = dataclass_field(init=False, repr=False)
+    # Casefolded text every match must contain, used to skip the regex cheaply
+    _required_literal: Optional[str] = dataclass_field(init=False, repr=False, default=None)
 
     def __post_init__(self) -> None:
         self._regex = re.compile(self.pattern, re.IGNORECASE)
+        self._required_literal = required_literal(self.pattern)
 
     def matches(self, transaction: AkahuTransaction) -> bool:
-        value = getattr(transaction, self.field_name, "")
-        if value is None:
-            value = ""
-        if not self._regex.search(str(value)):
+        value = field_text(transaction, self.field_name)
+        if (
+            self._required_literal is not None
+            and value.isascii()
+            and self._required_literal not in value.lower()
+        ):
+            return False
+        if not self._regex.search(value):
             return False
-        amount = transaction.amount
+        return self.amount_matches(transaction.amount)
+
+    def amount_matches(self, amount: float) -> bool:
         if self.min_amount is not None and amount < self.min_amount:
             return False
         if self.max_amount is not None and amount > self.max_amount:
@@ -35,12 +45,63 @@ class IgnoreRule:
         return True
 
 
-def build_ignore_rules(raw_rules: Optional[Sequence[Mapping[str, object]]]) -> List[IgnoreRule]:
-    """Create :class:`IgnoreRule` instances from config values."""
+class IgnoreRuleSet(Sequence[IgnoreRule]):
+    """Ignore rules with the patterns for each field fused into a single regex.
+
+    A transaction is then scanned once per distinct field instead of once per
+    rule. It behaves as a read-only sequence of the underlying rules.
+    """
+
+    def __init__(self, rules: Iterable[IgnoreRule] = ()):
+        self._rules = list(rules)
+        by_field: Dict[str, List[IgnoreRule]] = {}
+        for rule in self._rules:
+            by_field.setdefault(rule.field_name, []).append(rule)
+        self._fields: List[Tuple[str, List[IgnoreRule], Optional[Pattern[str]], Optional[Tuple[str, ...]]]] = []
+        for field_name, field_rules in by_field.items():
+            literals = tuple(rule._required_literal for rule in field_rules)
+            self._fields.append(
+                (
+                    field_name,
+                    field_rules,
+                    fuse_patterns(list(enumerate(rule.pattern for rule in field_rules))),
+                    None if None in literals else literals,
+                )
+            )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[IgnoreRule, List[IgnoreRule]]:
+        return self._rules[index]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def matches(self, transaction: AkahuTransaction) -> bool:
+        for field_name, field_rules, fused, literals in self._fields:
+            value = field_text(transaction, field_name)
+            if literals is not None and value.isascii():
+                # Every rule needs one of these substrings; without any, none can match.
+                folded = value.lower()
+                if not any(literal in folded for literal in literals):
+                    continue
+            if fused is not None:
+                match = fused.search(value)
+                if match is None:
+                    continue
+                if field_rules[int(match.lastgroup[1:])].amount_matches(transaction.amount):
+                    return True
+            # Either the patterns could not be fused, or the first rule found
+            # failed its amount bounds and another rule may still apply.
+            if any(rule.matches(transaction) for rule in field_rules):
+                return True
+        return False
+
+
+def build_ignore_rules(raw_rules: Optional[Sequence[Mapping[str, object]]]) -> IgnoreRuleSet:
+    """Create an :class:`IgnoreRuleSet` from config values."""
 
     rules: List[IgnoreRule] = []
     if not raw_rules:
-        return rules
+        return IgnoreRuleSet(rules)
     for raw in raw_rules:
         if not raw:
             continue
@@ -53,12 +114,14 @@ def build_ignore_rules(raw_rules: Optional[Sequence[Mapping[str, object]]]) -> L
         rules.append(
             IgnoreRule(field_name=field_name, pattern=pattern, min_amount=min_amount, max_amount=max_amount)
         )
-    return rules
+    return IgnoreRuleSet(rules)
 
 
 def should_ignore(transaction: AkahuTransaction, rules: Iterable[IgnoreRule]) -> bool:
     """Return True if a transaction should be dropped based on provided rules."""
 
+    if isinstance(rules, IgnoreRuleSet):
+        return rules.matches(transaction)
     for rule in rules:
         if rule.matches(transaction):
             return True
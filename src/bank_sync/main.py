@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
 import json
 import logging
 import os
@@ -9,10 +11,11 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence
 
+from bank_sync import json_compat
 from bank_sync.akahu_client import AkahuClient, AkahuTransaction
 from bank_sync.categoriser import Categoriser
 from bank_sync.reconciliation import reconcile
-from bank_sync.sheets_client import SheetsClient, TRANSACTION_HEADERS
+from bank_sync.sheets_client import HEADER_INDEX, SheetsClient, SheetTransaction
 from bank_sync.state_manager import SyncState
 from bank_sync.ignore_rules import build_ignore_rules, should_ignore
 
@@ -22,19 +25,48 @@ LOGGER = logging.getLogger(__name__)
 # Get project root (2 levels up from this file: src/bank_sync/main.py -> root)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 
+# New rows are appended in chunks of this size while Akahu pages stream in
+_APPEND_BATCH_SIZE = 500
+
+# Sheet columns rewritten when an existing row is recategorised
+_CATEGORISATION_COLUMNS = slice(HEADER_INDEX["category"], HEADER_INDEX["is_transfer"] + 1)
+
 
 def load_config(path: str | Path) -> Dict:
-    with open(path, "r", encoding="utf-8") as config_file:
-        return json.load(config_file)
+    """Load the JSON config at ``path``.
+
+    Parsed configs are cached until the file changes on disk, so callers must
+    treat the returned dict as read-only.
+    """
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    return _load_config_cached(str(resolved), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path: str, mtime_ns: int, size: int) -> Dict:
+    # mtime and size are only part of the cache key, so edits bust the cache
+    return json_compat.loads(Path(path).read_bytes())
+
+
+def _resolve_config_path() -> Path:
+    config_env = os.environ.get("SYNC_CONFIG")
+    return Path(config_env) if config_env else PROJECT_ROOT / "config" / "config.json"
+
+
+def _state_path(config: Dict) -> Path:
+    return Path(config.get("state_file", PROJECT_ROOT / "data" / "sync_state.json"))
+
 
+def upload_categories(csv_path: str, force: bool = False) -> None:
+    """Upload category rules from a local CSV file to the CategoryMap sheet tab.
 
-def upload_categories(csv_path: str) -> None:
-    """Upload category rules from a local CSV file to the CategoryMap sheet tab."""
+    The upload is skipped when the CSV matches the last one uploaded, unless
+    ``force`` is set (e.g. after the tab was edited by hand).
+    """
     import csv
     
-    config_env = os.environ.get("SYNC_CONFIG")
-    config_path = Path(config_env) if config_env else PROJECT_ROOT / "config" / "config.json"
-    config = load_config(config_path)
+    config = load_config(_resolve_config_path())
     credentials_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS") or config.get("google_service_file")
     if not credentials_path:
         raise RuntimeError("Either GOOGLE_APPLICATION_CREDENTIALS environment variable or 'google_service_file' in config must be set")
@@ -52,16 +84,35 @@ def upload_categories(csv_path: str) -> None:
         raise ValueError("CSV file is empty")
     
     LOGGER.info("Read %d rows from %s (including header)", len(rows), csv_path)
+
+    spreadsheet_id = config["spreadsheet_id"]
+    category_map_tab = config.get("category_map_tab", "CategoryMap")
+    state_path = _state_path(config)
+    state = SyncState.load(state_path)
+    # The target tab is hashed too, so pointing the config elsewhere uploads again
+    digest = _rows_digest([[spreadsheet_id, category_map_tab], *rows])
+    if not force and state.category_rules_digest == digest:
+        LOGGER.info("Category rules are unchanged since the last upload; skipping (use --force to upload anyway)")
+        return
     
     sheets_client = SheetsClient(
-        spreadsheet_id=config["spreadsheet_id"],
+        spreadsheet_id=spreadsheet_id,
         credentials_path=credentials_path,
         transactions_tab=config.get("transactions_tab", "Transactions"),
-        category_map_tab=config.get("category_map_tab", "CategoryMap"),
+        category_map_tab=category_map_tab,
     )
     
     sheets_client.upload_category_rules(rows)
     LOGGER.info("Successfully uploaded %d category rules to CategoryMap sheet", len(rows) - 1)
+    state.category_rules_digest = digest
+    state.save(state_path)
+
+
+def _rows_digest(rows: Sequence[Sequence[str]]) -> str:
+    # JSON quotes every cell, so no cell content can mimic a row or cell boundary.
+    # Plain json rather than json_compat keeps the digest the same with or without orjson.
+    encoded = json.dumps([list(row) for row in rows], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
 
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -82,21 +133,24 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         metavar="CSV_FILE",
         help="Upload category rules from a local CSV file to the CategoryMap sheet tab",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --upload-categories, upload even if the CSV is unchanged since the last upload",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: Sequence[str] | None = None) -> None:
     args = parse_args(argv)
     if args.upload_categories:
-        upload_categories(args.upload_categories)
+        upload_categories(args.upload_categories, force=args.force)
     else:
         run_sync(dry_run=args.dry_run, reset_state=args.reset_state)
 
 
 def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
-    config_env = os.environ.get("SYNC_CONFIG")
-    config_path = Path(config_env) if config_env else PROJECT_ROOT / "config" / "config.json"
-    config = load_config(config_path)
+    config = load_config(_resolve_config_path())
     credentials_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS") or config.get("google_service_file")
     if not credentials_path:
         raise RuntimeError("Either GOOGLE_APPLICATION_CREDENTIALS environment variable or 'google_service_file' in config must be set")
@@ -105,7 +159,7 @@ def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
     lookback_buffer_days = int(config.get("lookback_buffer_days", 3))
     end_timestamp = datetime.now(timezone.utc)
 
-    state_path = Path(config.get("state_file", PROJECT_ROOT / "data" / "sync_state.json"))
+    state_path = _state_path(config)
     state = SyncState.load(state_path)
     if state.last_synced_at and not reset_state:
         # Subtract buffer days to catch any late-settling transactions
@@ -122,106 +176,96 @@ def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
         category_map_tab=config.get("category_map_tab", "CategoryMap"),
     )
 
-    existing = sheets_client.fetch_transactions()
-    existing_map = {txn.id: txn for txn in existing if txn.id}
+    # Both tabs come back from a single request
+    existing_rows, category_rules = sheets_client.fetch_transactions_and_rules()
+    # Built straight from the row stream, so the sheet is never held twice
+    existing_map: Dict[str, SheetTransaction] = {
+        sheet_txn.id: sheet_txn for sheet_txn in existing_rows if sheet_txn.id
+    }
 
-    category_rules = sheets_client.fetch_category_rules()
     categoriser = Categoriser(category_rules)
     ignore_rules = build_ignore_rules(config.get("ignore_rules"))
 
     akahu_client = AkahuClient(
         user_token=config["akahu_user_token"],
         app_token=config["akahu_app_token"],
+        cache_path=Path(config.get("akahu_accounts_cache", PROJECT_ROOT / "data" / "akahu_accounts.json")),
     )
 
     LOGGER.info("Fetching Akahu transactions between %s and %s", start_timestamp, end_timestamp)
-    fetched_transactions: List[AkahuTransaction] = list(
-        akahu_client.fetch_settled_transactions(start_datetime=start_timestamp, end_datetime=end_timestamp)
+    fetched_transactions: Iterable[AkahuTransaction] = akahu_client.fetch_settled_transactions(
+        start_datetime=start_timestamp, end_datetime=end_timestamp
     )
-    LOGGER.info("Fetched %d transactions from Akahu", len(fetched_transactions))
 
-    imported_at = datetime.now(timezone.utc)
+    # Every row from this sync shares the same import timestamp, so format it once
+    imported_at = datetime.now(timezone.utc).isoformat()
     new_rows: List[List[str]] = []
+    appended_count = 0
     updates: List[tuple[int, List[str]]] = []
     seen_ids = set()
+    fetched_count = 0
 
-    # Process fetched transactions from Akahu
+    # Process fetched transactions from Akahu as they stream in page by page
     for transaction in fetched_transactions:
+        fetched_count += 1
         if should_ignore(transaction, ignore_rules):
             LOGGER.info("Ignoring transaction %s (%s) due to ignore rules", transaction.id, transaction.description_raw)
             continue
         seen_ids.add(transaction.id)
-        transaction_dict = {
-            "id": transaction.id,
-            "date": transaction.date,
-            "account": transaction.account,
-            "amount": f"{transaction.amount:.2f}",
-            "balance": "" if transaction.balance is None else f"{transaction.balance:.2f}",
-            "description_raw": transaction.description_raw,
-            "merchant_normalised": transaction.merchant_normalised,
-            "source": transaction.source,
-        }
-        category, category_type = categoriser.categorise(transaction_dict)
-        is_transfer = categoriser.detect_transfer(transaction_dict)
+        category, category_type = categoriser.categorise(transaction)
+        is_transfer = categoriser.detect_transfer(transaction)
         row = transaction.to_row(category=category, category_type=category_type, is_transfer=is_transfer, imported_at=imported_at)
 
         if transaction.id not in existing_map:
             new_rows.append(row)
+            # Write new rows while later pages are still downloading, so the
+            # full result set is never held in memory at once
+            if not dry_run and len(new_rows) >= _APPEND_BATCH_SIZE:
+                sheets_client.append_transactions(new_rows)
+                appended_count += len(new_rows)
+                new_rows = []
             continue
 
         sheet_txn = existing_map[transaction.id]
-        if _needs_update(sheet_txn.data, row):
+        if _needs_update(sheet_txn.values, row):
             updates.append((sheet_txn.row_index, row))
 
+    LOGGER.info("Fetched %d transactions from Akahu", fetched_count)
+
     # Recategorize all existing transactions that weren't fetched from Akahu
     # This ensures category/category_type updates are applied to all historical transactions
-    for sheet_txn in existing:
-        if sheet_txn.id in seen_ids or not sheet_txn.id:
-            continue  # Already processed or no ID
+    for sheet_txn in existing_map.values():
+        if sheet_txn.id in seen_ids:
+            continue  # Already processed
         
         # Mark as seen so it doesn't get deleted
         seen_ids.add(sheet_txn.id)
         
-        # Recategorize this existing transaction
-        transaction_dict = {
-            "id": sheet_txn.data.get("id", ""),
-            "date": sheet_txn.data.get("date", ""),
-            "account": sheet_txn.data.get("account", ""),
-            "amount": sheet_txn.data.get("amount", ""),
-            "balance": sheet_txn.data.get("balance", ""),
-            "description_raw": sheet_txn.data.get("description_raw", ""),
-            "merchant_normalised": sheet_txn.data.get("merchant_normalised", ""),
-            "source": sheet_txn.data.get("source", ""),
-        }
-        category, category_type = categoriser.categorise(transaction_dict)
-        is_transfer = categoriser.detect_transfer(transaction_dict)
-        
-        # Build the row with updated category/category_type
-        row = [
-            transaction_dict["id"],
-            transaction_dict["date"],
-            transaction_dict["account"],
-            transaction_dict["amount"],
-            transaction_dict["balance"],
-            transaction_dict["description_raw"],
-            transaction_dict["merchant_normalised"],
-            category,
-            category_type,
-            str(is_transfer).upper(),
-            transaction_dict["source"],
-            sheet_txn.data.get("imported_at", ""),  # Keep original import time
-        ]
-        
-        if _needs_update(sheet_txn.data, row):
+        # Recategorize this existing transaction; sheet rows expose every field the
+        # categoriser reads as attributes, so the row is used as-is
+        category, category_type = categoriser.categorise(sheet_txn)
+        is_transfer = categoriser.detect_transfer(sheet_txn)
+        categorisation = (category, category_type, str(is_transfer).upper())
+
+        # Only the categorisation cells can change; the rest of the row (including
+        # the original import time) is kept as it is in the sheet
+        if sheet_txn.values[_CATEGORISATION_COLUMNS] != categorisation:
+            row = list(sheet_txn.values)
+            row[_CATEGORISATION_COLUMNS] = categorisation
             updates.append((sheet_txn.row_index, row))
 
-    rows_to_delete = [txn.row_index for txn in existing if txn.id and txn.id not in seen_ids]
+    rows_to_delete = [txn.row_index for txn_id, txn in existing_map.items() if txn_id not in seen_ids]
 
-    LOGGER.info("Processing complete: %d new, %d updates, %d deletions", len(new_rows), len(updates), len(rows_to_delete))
+    LOGGER.info(
+        "Processing complete: %d new, %d updates, %d deletions",
+        appended_count + len(new_rows),
+        len(updates),
+        len(rows_to_delete),
+    )
 
     # Safety check: warn if deleting many transactions with few/no new ones
     deletion_threshold = int(config.get("deletion_warning_threshold", 50))
-    if len(rows_to_delete) >= deletion_threshold and len(fetched_transactions) == 0:
+    if len(rows_to_delete) >= deletion_threshold and fetched_count == 0:
         LOGGER.error(
             "SAFETY CHECK FAILED: About to delete %d transactions but fetched 0 new ones. "
             "This likely indicates a bug. Aborting to prevent data loss. "
@@ -237,12 +281,7 @@ def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
         for line in _format_mutation_summary(new_rows, updates, rows_to_delete):
             LOGGER.info("Dry-run: %s", line)
     else:
-        if new_rows:
-            sheets_client.append_transactions(new_rows)
-        if updates:
-            sheets_client.batch_update_transactions(updates)
-        if rows_to_delete:
-            sheets_client.delete_rows(rows_to_delete)
+        sheets_client.flush(new_rows=new_rows, updates=updates, rows_to_delete=rows_to_delete)
 
         # Update Dashboard with sync metadata
         if config.get("update_dashboard", True):
@@ -250,12 +289,13 @@ def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
             # Get current time for last sync
             sync_completion_time = datetime.now(timezone.utc)
             
-            # Find the most recent transaction date from all existing transactions
-            all_transactions = sheets_client.fetch_transactions()
+            # Find the most recent transaction date from all existing transactions;
+            # the client mirrors its own writes, so this normally needs no request
+            all_transactions = sheets_client.fetch_transactions(use_cache=True)
             most_recent_date = ""
             if all_transactions:
                 # Sort by date and get the most recent
-                dates = [txn.data.get("date", "") for txn in all_transactions if txn.data.get("date")]
+                dates = [txn.date for txn in all_transactions if txn.date]
                 if dates:
                     most_recent_date = max(dates)
             
@@ -265,9 +305,9 @@ def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
                 dashboard_tab=dashboard_tab
             )
 
-        # Re-fetch transactions after updates for accurate reconciliation
+        # Reconcile against the sheet as it stands after this sync's writes
         if config.get("perform_reconciliation", False):
-            updated_transactions = sheets_client.fetch_transactions()
+            updated_transactions = sheets_client.fetch_transactions(use_cache=True)
             results = reconcile([txn.data for txn in updated_transactions])
             for result in results:
                 if result.is_ok:
@@ -287,11 +327,9 @@ def run_sync(dry_run: bool = False, reset_state: bool = False) -> None:
         state.save(state_path)
 
 
-def _needs_update(existing: Dict[str, str], new_row: List[str]) -> bool:
-    for header, value in zip(TRANSACTION_HEADERS, new_row):
-        if str(existing.get(header, "")) != value:
-            return True
-    return False
+def _needs_update(existing: Sequence[str], new_row: Sequence[str]) -> bool:
+    """Return True if the sheet row values differ from the freshly built row."""
+    return tuple(existing) != tuple(new_row)
 
 
 def _format_mutation_summary(
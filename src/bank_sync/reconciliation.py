@@ -1,9 +1,8 @@
 """Simple reconciliation helpers."""
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import dataclass
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional
 
 
 @dataclass
@@ -19,32 +18,47 @@ class ReconciliationResult:
 
 
 def reconcile(transactions: Iterable[dict]) -> List[ReconciliationResult]:
-    grouped: Dict[str, List[dict]] = defaultdict(list)
+    # Single pass: running amount totals plus the latest known balance per account.
+    # Totals are kept in integer cents so thousands of additions can't drift.
+    sheet_cents: Dict[str, int] = {}
+    latest_balances: Dict[str, tuple[str, float]] = {}
     for txn in transactions:
-        grouped[txn.get("account", "unknown")].append(txn)
+        account = txn.get("account", "unknown")
+        sheet_cents[account] = sheet_cents.get(account, 0) + _to_cents(txn.get("amount", 0))
+        balance = _parse_balance(txn)
+        if balance is None:
+            continue
+        txn_date = txn.get("date", "")
+        latest = latest_balances.get(account)
+        # ">=" so that, for equal dates, the later row wins as it did with a stable sort
+        if latest is None or txn_date >= latest[0]:
+            latest_balances[account] = (txn_date, balance)
 
     results: List[ReconciliationResult] = []
-    for account, account_transactions in grouped.items():
-        sheet_balance = sum(float(txn.get("amount", 0)) for txn in account_transactions)
-        expected_balance = _latest_balance(account_transactions)
-        difference = (expected_balance or 0) - sheet_balance
+    for account, cents in sheet_cents.items():
+        sheet_balance = cents / 100
+        expected_balance = latest_balances[account][1] if account in latest_balances else 0.0
+        difference = expected_balance - sheet_balance
         results.append(
             ReconciliationResult(
                 account=account,
                 difference=difference,
-                expected_balance=expected_balance or 0,
+                expected_balance=expected_balance,
                 sheet_balance=sheet_balance,
             )
         )
     return results
 
 
-def _latest_balance(transactions: List[dict]) -> float:
-    sorted_txn = sorted(transactions, key=lambda t: t.get("date", ""))
-    for txn in reversed(sorted_txn):
-        if txn.get("balance"):
-            try:
-                return float(txn["balance"])
-            except (KeyError, ValueError, TypeError):
-                continue
-    return 0.0
+def _parse_balance(txn: dict) -> Optional[float]:
+    if not txn.get("balance"):
+        return None
+    try:
+        return float(txn["balance"])
+    except (KeyError, ValueError, TypeError):
+        return None
+
+
+def _to_cents(value: object) -> int:
+    # float() is the fastest parser available; rounding absorbs its binary error
+    return round(float(value) * 100)
@@ -0,0 +1,97 @@
+"""Regex helpers shared by the category and ignore rules."""
+from __future__ import annotations
+
+import re
+from collections.abc import Mapping
+from typing import Any, List, Optional, Pattern, Sequence, Tuple
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+# Opcodes that refer back to a group by number, which fusing would shift
+_GROUP_REFERENCE_OPCODES = (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS)
+
+
+def field_text(transaction: Any, name: str) -> str:
+    """Return a field of a sheet-style dict or Akahu transaction as rule text.
+
+    Numbers are formatted as ``to_row`` writes them, so a rule on ``amount``
+    sees "-50.00" whether the transaction came from Akahu or the sheet.
+    """
+    if isinstance(transaction, Mapping):
+        value = transaction.get(name)
+    else:
+        value = getattr(transaction, name, None)
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def has_group_references(pattern: str) -> bool:
+    """Return True if ``pattern`` uses backreferences or conditional groups.
+
+    Unparseable patterns count as referencing groups, so they are never fused.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, OverflowError, RecursionError):
+        return True
+    pending: List[Any] = [parsed]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (list, tuple, sre_parse.SubPattern)):
+            # Opcodes are singletons; compare by identity so plain ints don't match
+            if len(node) == 2 and any(node[0] is opcode for opcode in _GROUP_REFERENCE_OPCODES):
+                return True
+            pending.extend(node)
+    return False
+
+
+def fuse_patterns(patterns: Sequence[Tuple[int, str]], *, in_order: bool = False) -> Optional[Pattern[str]]:
+    """Combine ``(key, pattern)`` pairs into one regex whose ``lastgroup`` is ``r<key>``.
+
+    By default the result is a bare alternation, for use with ``search``, which
+    finds the leftmost match of any pattern. With ``in_order``, each pattern
+    sits in its own lookahead anchored at the start of the string, so with
+    ``match`` the first listed pattern that matches anywhere wins instead.
+    Returns None when the patterns cannot be combined safely, e.g. because of
+    group references or clashing group names.
+    """
+    if len(patterns) < 2 or any(has_group_references(pattern) for _, pattern in patterns):
+        return None
+    if in_order:
+        alternation = "|".join(f"(?=[\\s\\S]*?(?P<r{key}>{pattern}))" for key, pattern in patterns)
+    else:
+        alternation = "|".join(f"(?P<r{key}>{pattern})" for key, pattern in patterns)
+    try:
+        return re.compile(alternation, re.IGNORECASE)
+    except re.error:
+        return None
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """Return the longest ASCII text any match of ``pattern`` must contain, casefolded.
+
+    Only literals at the top level of the parsed pattern are considered, since
+    those cannot be skipped by alternation, repetition or lookarounds. The
+    check is only sound against ASCII text: outside it, re.IGNORECASE equates
+    characters that casefold() keeps apart, such as "İ" and "i".
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, OverflowError, RecursionError):
+        return None
+    best = ""
+    run: List[str] = []
+    for opcode, argument in list(parsed) + [(None, None)]:
+        if opcode is sre_parse.LITERAL and argument < 128:
+            run.append(chr(argument))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best.casefold() or None
@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 import logging
+import re
 from dataclasses import dataclass
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
 
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -25,16 +26,70 @@ TRANSACTION_HEADERS = [
     "source",
     "imported_at",
 ]
+COLUMN_COUNT = len(TRANSACTION_HEADERS)
+HEADER_INDEX = {header: index for index, header in enumerate(TRANSACTION_HEADERS)}
+_ID_INDEX = HEADER_INDEX["id"]
 
 
-@dataclass
+@dataclass(slots=True)
 class SheetTransaction:
-    data: Dict[str, str]
+    """A transactions-tab row, stored as its cell values in TRANSACTION_HEADERS order.
+
+    Columns are also readable as attributes (``txn.merchant_normalised``), so
+    rows can be categorised like :class:`AkahuTransaction` without building a
+    dict per row.
+    """
+
+    values: tuple[str, ...]
     row_index: int
 
+    def __getattr__(self, name: str) -> str:
+        # Only reached for names that aren't real attributes. Other names,
+        # including an unset slot during copy or unpickling, fail at once
+        # rather than recursing through self.values.
+        index = HEADER_INDEX.get(name)
+        if index is None:
+            raise AttributeError(name)
+        return object.__getattribute__(self, "values")[index]
+
     @property
     def id(self) -> str:
-        return self.data.get("id", "")
+        return self.values[_ID_INDEX]
+
+    @property
+    def data(self) -> Dict[str, str]:
+        """The row as a header -> value dict (built on each access)."""
+        return dict(zip(TRANSACTION_HEADERS, self.values))
+
+
+def _contiguous_runs(row_indices: Iterable[int]) -> List[tuple[int, int]]:
+    """Group row indices into inclusive (first, last) runs, bottom of the sheet first.
+
+    Deleting the lowest runs first keeps the indices of the remaining runs valid.
+    Duplicate indices are collapsed, since each row can only be deleted once.
+    """
+    runs: List[tuple[int, int]] = []
+    for index in sorted(set(row_indices), reverse=True):
+        if runs and runs[-1][0] - 1 == index:
+            runs[-1] = (index, runs[-1][1])
+        else:
+            runs.append((index, index))
+    return runs
+
+
+# First and last row numbers of an A1 range such as "Transactions!A10:L12"
+_UPDATED_ROWS_RE = re.compile(r"[A-Z]+(\d+):[A-Z]+(\d+)$")
+
+
+def _padded(row: Sequence[str]) -> tuple[str, ...]:
+    values = tuple(row)
+    if len(values) >= COLUMN_COUNT:
+        return values
+    return values + ("",) * (COLUMN_COUNT - len(values))
+
+
+def _sheet_transaction(row_index: int, values: tuple[str, ...]) -> SheetTransaction:
+    return SheetTransaction(values=values, row_index=row_index)
 
 
 class SheetsClient:
@@ -45,6 +100,7 @@ class SheetsClient:
         credentials_path: str,
         transactions_tab: str = "Transactions",
         category_map_tab: str = "CategoryMap",
+        num_retries: int = 5,
     ) -> None:
         self._spreadsheet_id = spreadsheet_id
         self._transactions_tab = transactions_tab
@@ -52,15 +108,27 @@ class SheetsClient:
         credentials = Credentials.from_service_account_file(
             credentials_path, scopes=["https://www.googleapis.com/auth/spreadsheets"]
         )
+        # The discovery client's httplib2 transport already reuses its HTTPS
+        # connection; retries cover 429s and transient 5xx responses with backoff.
+        # They apply only to requests that are safe to repeat: a replayed append
+        # would duplicate rows and a replayed deleteDimension would delete the
+        # rows that shifted up into the range
         self._service = build("sheets", "v4", credentials=credentials, cache_discovery=False)
+        self._num_retries = num_retries
         self._sheet_id_cache: dict[str, int] = {}
+        # Values of the transactions tab (row 2 onwards) as last read, kept in
+        # step with this client's own writes; None when it may be out of date
+        self._rows_cache: Optional[List[tuple[str, ...]]] = None
 
     def _get_sheet_id(self, sheet_name: str) -> int:
         """Get the sheetId for a given sheet name."""
         if sheet_name in self._sheet_id_cache:
             return self._sheet_id_cache[sheet_name]
         
-        metadata = self._service.spreadsheets().get(spreadsheetId=self._spreadsheet_id).execute()
+        # Only the tab ids and titles are needed, not the full spreadsheet resource
+        metadata = self._service.spreadsheets().get(
+            spreadsheetId=self._spreadsheet_id, fields="sheets.properties(sheetId,title)"
+        ).execute(num_retries=self._num_retries)
         for sheet in metadata.get("sheets", []):
             properties = sheet.get("properties", {})
             title = properties.get("title", "")
@@ -69,18 +137,52 @@ class SheetsClient:
         
         return self._sheet_id_cache.get(sheet_name, 0)
 
-    def fetch_transactions(self) -> List[SheetTransaction]:
+    def fetch_transactions(self, *, use_cache: bool = False) -> List[SheetTransaction]:
+        """Return every transaction row.
+
+        With ``use_cache``, rows are rebuilt from the last read plus this
+        client's own writes since then, skipping the request when possible.
+        """
+        if use_cache and self._rows_cache is not None:
+            return [
+                _sheet_transaction(offset, values) for offset, values in enumerate(self._rows_cache, start=2)
+            ]
+        return list(self.iter_transactions())
+
+    def iter_transactions(self) -> Iterator[SheetTransaction]:
+        """Yield the transaction rows one at a time, without building a list."""
         range_name = f"{self._transactions_tab}!A2:L"
         response = self._service.spreadsheets().values().get(
-            spreadsheetId=self._spreadsheet_id, range=range_name
-        ).execute()
-        rows = response.get("values", [])
-        transactions: List[SheetTransaction] = []
+            spreadsheetId=self._spreadsheet_id, range=range_name, fields="values"
+        ).execute(num_retries=self._num_retries)
+        yield from self._transactions_from_rows(response.get("values", []))
+
+    def fetch_transactions_and_rules(self) -> tuple[Iterator[SheetTransaction], List[Dict[str, str]]]:
+        """Read the transactions and category rules tabs in one ``values.batchGet``.
+
+        Transactions are returned as a lazy iterator, like :meth:`iter_transactions`.
+        """
+        response = self._service.spreadsheets().values().batchGet(
+            spreadsheetId=self._spreadsheet_id,
+            ranges=[f"{self._transactions_tab}!A2:L", f"{self._category_tab}!A2:F"],
+            # "range" keeps each entry present even when its tab is empty
+            fields="valueRanges(range,values)",
+        ).execute(num_retries=self._num_retries)
+        transaction_range, rules_range = response.get("valueRanges", [{}, {}])
+        return (
+            self._transactions_from_rows(transaction_range.get("values", [])),
+            _category_rules_from_rows(rules_range.get("values", [])),
+        )
+
+    def _transactions_from_rows(self, rows: List[List[str]]) -> Iterator[SheetTransaction]:
+        self._rows_cache = None
+        cached: List[tuple[str, ...]] = []
         for offset, row in enumerate(rows, start=2):
-            padded = row + [""] * (len(TRANSACTION_HEADERS) - len(row))
-            data = dict(zip(TRANSACTION_HEADERS, padded))
-            transactions.append(SheetTransaction(data=data, row_index=offset))
-        return transactions
+            values = _padded(row)
+            cached.append(values)
+            yield _sheet_transaction(offset, values)
+        # Only a fully consumed read is a complete picture of the tab
+        self._rows_cache = cached
 
     def append_transactions(self, rows: Iterable[List[str]]) -> None:
         if not rows:
@@ -88,12 +190,19 @@ class SheetsClient:
         range_name = f"{self._transactions_tab}!A:L"
         body = {"values": list(rows)}
         LOGGER.info("Appending %s new transactions", len(body["values"]))
-        self._service.spreadsheets().values().append(
+        # Not retried: the request may have been applied even if its response was lost
+        response = self._service.spreadsheets().values().append(
             spreadsheetId=self._spreadsheet_id,
             range=range_name,
             valueInputOption="USER_ENTERED",
             body=body,
         ).execute()
+        # Sheets picks the target rows itself; follow it so later writes land below
+        match = _UPDATED_ROWS_RE.search((response or {}).get("updates", {}).get("updatedRange", ""))
+        if match:
+            self._cache_rows(int(match.group(1)), body["values"])
+        else:
+            self._rows_cache = None
 
     def update_transaction(self, row_index: int, row: List[str]) -> None:
         range_name = f"{self._transactions_tab}!A{row_index}:L{row_index}"
@@ -103,75 +212,100 @@ class SheetsClient:
             range=range_name,
             valueInputOption="USER_ENTERED",
             body={"values": [row]},
-        ).execute()
+        ).execute(num_retries=self._num_retries)
+        self._cache_rows(row_index, [row])
 
     def batch_update_transactions(self, updates: List[tuple[int, List[str]]]) -> None:
         """Update multiple rows in a single batch request."""
-        if not updates:
-            return
-        
-        data = [
-            {
-                "range": f"{self._transactions_tab}!A{row_index}:L{row_index}",
-                "values": [row]
-            }
-            for row_index, row in updates
-        ]
-        
-        LOGGER.info("Batch updating %d rows", len(updates))
-        self._service.spreadsheets().values().batchUpdate(
-            spreadsheetId=self._spreadsheet_id,
-            body={
-                "valueInputOption": "USER_ENTERED",
-                "data": data
-            }
-        ).execute()
+        self.flush(updates=updates)
+
+    def flush(
+        self,
+        *,
+        new_rows: Sequence[List[str]] = (),
+        updates: Sequence[tuple[int, List[str]]] = (),
+        rows_to_delete: Iterable[int] = (),
+    ) -> None:
+        """Apply a sync's row changes in as few requests as possible.
+
+        Updates go out in one ``values.batchUpdate`` and new rows in one
+        ``values.append``, which lets Sheets grow the tab and never overwrites
+        rows written since the read; deletions follow in one
+        ``spreadsheets.batchUpdate``. Update and delete indices refer to the
+        tab as it was read.
+        """
+        if updates:
+            data = [
+                {
+                    "range": f"{self._transactions_tab}!A{row_index}:L{row_index}",
+                    "values": [row]
+                }
+                for row_index, row in updates
+            ]
+            LOGGER.info("Batch updating %d rows", len(updates))
+            self._service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self._spreadsheet_id,
+                body={
+                    "valueInputOption": "USER_ENTERED",
+                    "data": data
+                }
+            ).execute(num_retries=self._num_retries)
+            for row_index, row in updates:
+                self._cache_rows(row_index, [row])
+        self.append_transactions(new_rows)
+        self.delete_rows(list(rows_to_delete))
 
     def delete_rows(self, row_indices: List[int]) -> None:
         if not row_indices:
             return
         sheet_id = self._get_sheet_id(self._transactions_tab)
+        runs = _contiguous_runs(row_indices)
         requests = [
             {
                 "deleteDimension": {
                     "range": {
                         "sheetId": sheet_id,
                         "dimension": "ROWS",
-                        "startIndex": index - 1,
-                        "endIndex": index,
+                        "startIndex": first - 1,
+                        "endIndex": last,
                     }
                 }
             }
-            for index in sorted(row_indices, reverse=True)
+            for first, last in runs
         ]
         LOGGER.warning("Deleting %s transactions", len(row_indices))
         try:
+            # Not retried, since deleting rows by index isn't idempotent
             self._service.spreadsheets().batchUpdate(
                 spreadsheetId=self._spreadsheet_id, body={"requests": requests}
             ).execute()
         except HttpError:
             LOGGER.exception("Failed deleting rows")
             raise
+        if self._rows_cache is not None:
+            if runs[0][1] - 2 >= len(self._rows_cache):
+                self._rows_cache = None
+            else:
+                for first, last in runs:
+                    del self._rows_cache[first - 2:last - 1]
+
+    def _cache_rows(self, start_row: int, rows: Sequence[List[str]]) -> None:
+        """Mirror rows written from ``start_row`` onwards into the cached tab values."""
+        if self._rows_cache is None:
+            return
+        offset = start_row - 2
+        if offset < 0 or offset > len(self._rows_cache):
+            # A write that leaves a gap or lands above the data can't be mirrored
+            self._rows_cache = None
+            return
+        self._rows_cache[offset:offset + len(rows)] = [_padded(row) for row in rows]
 
     def fetch_category_rules(self) -> List[Dict[str, str]]:
         range_name = f"{self._category_tab}!A2:F"
         response = self._service.spreadsheets().values().get(
-            spreadsheetId=self._spreadsheet_id, range=range_name
-        ).execute()
-        rules = []
-        for row in response.get("values", []):
-            padded = row + [""] * (6 - len(row))
-            rules.append(
-                {
-                    "pattern": padded[0],
-                    "field": padded[1] or "merchant_normalised",
-                    "category": padded[2] or "Uncategorised",
-                    "priority": padded[3] or "1000",
-                    "amount_condition": padded[4],
-                    "category_type": padded[5],
-                }
-            )
-        return rules
+            spreadsheetId=self._spreadsheet_id, range=range_name, fields="values"
+        ).execute(num_retries=self._num_retries)
+        return _category_rules_from_rows(response.get("values", []))
 
     def upload_category_rules(self, rows: List[List[str]]) -> None:
         """Clear the CategoryMap sheet and upload new rules from CSV rows."""
@@ -183,7 +317,7 @@ class SheetsClient:
         self._service.spreadsheets().values().clear(
             spreadsheetId=self._spreadsheet_id,
             range=range_name
-        ).execute()
+        ).execute(num_retries=self._num_retries)
         LOGGER.info("Cleared existing category rules")
         
         # Upload new data (including header if first row)
@@ -194,7 +328,7 @@ class SheetsClient:
             range=range_name,
             valueInputOption="USER_ENTERED",
             body=body,
-        ).execute()
+        ).execute(num_retries=self._num_retries)
         LOGGER.info("Uploaded %d rows to CategoryMap", len(rows))
 
     def update_dashboard(self, *, last_sync_time: str, most_recent_transaction_date: str, dashboard_tab: str = "Dashboard") -> None:
@@ -237,4 +371,21 @@ class SheetsClient:
                 "valueInputOption": "USER_ENTERED",
                 "data": data
             }
-        ).execute()
+        ).execute(num_retries=self._num_retries)
+
+
+def _category_rules_from_rows(rows: List[List[str]]) -> List[Dict[str, str]]:
+    rules = []
+    for row in rows:
+        padded = row + [""] * (6 - len(row))
+        rules.append(
+            {
+                "pattern": padded[0],
+                "field": padded[1] or "merchant_normalised",
+                "category": padded[2] or "Uncategorised",
+                "priority": padded[3] or "1000",
+                "amount_condition": padded[4],
+                "category_type": padded[5],
+            }
+        )
+    return rules
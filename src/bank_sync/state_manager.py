@@ -1,34 +1,44 @@
 """Simple persistence for keeping track of the last sync timestamp."""
 from __future__ import annotations
 
-import json
+import contextlib
+import os
+import stat
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from bank_sync import json_compat
+
 
 @dataclass
 class SyncState:
     """Represents persisted metadata for the sync process."""
 
     last_synced_at: Optional[datetime] = None
+    # Digest of the category rules CSV last uploaded to the CategoryMap tab
+    category_rules_digest: Optional[str] = None
 
     @classmethod
     def load(cls, path: Path) -> "SyncState":
         if not path.exists():
             return cls()
         try:
-            payload = json.loads(path.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
+            payload = json_compat.loads(path.read_bytes())
+        except (ValueError, OSError):
             return cls()
+        digest = payload.get("category_rules_digest")
+        state = cls(category_rules_digest=digest if isinstance(digest, str) else None)
         last_synced_raw = payload.get("last_synced_at")
         if not last_synced_raw:
-            return cls()
+            return state
         try:
-            return cls(last_synced_at=datetime.fromisoformat(last_synced_raw))
+            state.last_synced_at = datetime.fromisoformat(last_synced_raw)
         except (TypeError, ValueError):
-            return cls()
+            pass
+        return state
 
     def save(self, path: Path) -> None:
         if not path.parent.exists():
@@ -36,4 +46,32 @@ class SyncState:
         payload = {
             "last_synced_at": self.last_synced_at.isoformat() if self.last_synced_at else None,
         }
-        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        if self.category_rules_digest:
+            payload["category_rules_digest"] = self.category_rules_digest
+        _write_atomic(path, json_compat.dumps(payload, indent=True))
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Replace ``path`` with ``data`` so readers never see a partial file.
+
+    The data goes to a temporary file in the same directory, which is then
+    renamed over the target. No fsync is done: a crash may lose the newest
+    state, but never leaves a truncated file behind. The target keeps its
+    permissions; a new file gets 0644 rather than the temporary file's 0600.
+    """
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        mode = 0o644
+    tmp_name: Optional[str] = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as tmp:
+            tmp_name = tmp.name
+            tmp.write(data)
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if tmp_name is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+        raise
@@ -12,12 +12,39 @@ def _install_requests_stub():
     requests_module = types.ModuleType("requests")
 
     class DummySession:
+        def mount(self, prefix, adapter):
+            pass
+
         def request(self, *args, **kwargs):  # pragma: no cover - never called
             raise RuntimeError("Dummy session should be overridden in tests")
 
     requests_module.Session = DummySession
     sys.modules.setdefault("requests", requests_module)
 
+    adapters = types.ModuleType("requests.adapters")
+
+    class HTTPAdapter:
+        def __init__(self, *args, **kwargs):  # pragma: no cover - never used for real requests
+            pass
+
+    adapters.HTTPAdapter = HTTPAdapter
+    sys.modules.setdefault("requests.adapters", adapters)
+
+
+def _install_urllib3_stub():
+    urllib3 = types.ModuleType("urllib3")
+    util = types.ModuleType("urllib3.util")
+    retry = types.ModuleType("urllib3.util.retry")
+
+    class Retry:
+        def __init__(self, *args, **kwargs):  # pragma: no cover - never used for real requests
+            pass
+
+    retry.Retry = Retry
+    sys.modules.setdefault("urllib3", urllib3)
+    sys.modules.setdefault("urllib3.util", util)
+    sys.modules.setdefault("urllib3.util.retry", retry)
+
 
 def _install_google_api_stubs():
     googleapiclient = types.ModuleType("googleapiclient")
@@ -53,4 +80,5 @@ def _install_google_api_stubs():
 
 
 _install_requests_stub()
+_install_urllib3_stub()
 _install_google_api_stubs()
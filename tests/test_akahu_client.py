@@ -1,32 +1,44 @@
 import datetime as dt
+import json
+import time
 from typing import Dict, List
 
 import pytest
 
-from bank_sync.akahu_client import AkahuClient, AkahuTransaction, _ensure_iso_date, _safe_float
+from bank_sync.akahu_client import AkahuClient, AkahuTransaction, _ensure_iso_date, _parse_iso_date, _safe_float
 
 
 class FakeResponse:
-    def __init__(self, payload: Dict):
+    def __init__(self, payload: Dict, status_code: int = 200, headers: Dict[str, str] | None = None):
         self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self) -> None:  # pragma: no cover - nothing to do
         return None
 
-    def json(self) -> Dict:
-        return self._payload
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self._payload).encode("utf-8")
 
 
 class FakeSession:
-    def __init__(self, responses: List[Dict]):
-        self._responses = responses
+    """Serves queued payloads per endpoint path; requests may arrive from worker threads."""
+
+    def __init__(self, responses: Dict[str, List[Dict]]):
+        self._responses = {path: list(payloads) for path, payloads in responses.items()}
         self.request_calls = []
 
     def request(self, method, url, headers=None, params=None, timeout=None):
         self.request_calls.append((method, url, headers, params, timeout))
-        if not self._responses:
-            raise AssertionError("No more fake responses configured")
-        return FakeResponse(self._responses.pop(0))
+        path = "/" + url.rsplit("/", 1)[-1]
+        if not self._responses.get(path):
+            raise AssertionError(f"No more fake responses configured for {path}")
+        response = self._responses[path].pop(0)
+        return response if isinstance(response, FakeResponse) else FakeResponse(response)
+
+    def calls_to(self, path: str) -> List:
+        return [call for call in self.request_calls if call[1].endswith(path)]
 
 
 @pytest.fixture
@@ -60,29 +72,41 @@ def test_transaction_to_row_formats_numbers(transaction_payload):
     assert row[7] == "Groceries"
     assert row[8] == "E"
     assert row[9] == "FALSE"
+    assert row[11] == "2023-09-02T10:00:00"
+
+
+def test_transaction_to_row_accepts_preformatted_import_time(transaction_payload):
+    txn = AkahuTransaction.from_payload(transaction_payload, source="akahu_bnz", account_name="Cheque")
+    row = txn.to_row(category="Groceries", category_type="E", is_transfer=True, imported_at="2023-09-02T10:00:00+00:00")
+    assert row[9] == "TRUE"
+    assert row[11] == "2023-09-02T10:00:00+00:00"
 
 
 def test_fetch_settled_transactions_paginates(transaction_payload):
-    # Mock /accounts response first, then transaction pages
-    responses = [
-        {
-            "items": [
-                {"_id": "acc_1", "name": "Cheque"},
-            ],
-        },
-        {
-            "items": [
-                {**transaction_payload, "_account": "acc_1"},
-            ],
-            "cursor": {"next": "next-token"},
-        },
-        {
-            "items": [
-                {**transaction_payload, "_id": "txn_456", "_account": "acc_1"},
-            ],
-            "cursor": {},
-        },
-    ]
+    # Mock /accounts response plus two transaction pages
+    responses = {
+        "/accounts": [
+            {
+                "items": [
+                    {"_id": "acc_1", "name": "Cheque"},
+                ],
+            },
+        ],
+        "/transactions": [
+            {
+                "items": [
+                    {**transaction_payload, "_account": "acc_1"},
+                ],
+                "cursor": {"next": "next-token"},
+            },
+            {
+                "items": [
+                    {**transaction_payload, "_id": "txn_456", "_account": "acc_1"},
+                ],
+                "cursor": {},
+            },
+        ],
+    }
     session = FakeSession(responses)
     client = AkahuClient(user_token="user", app_token="app", session=session)
 
@@ -106,6 +130,103 @@ def test_safe_float_handles_invalid_values():
 
 def test_ensure_iso_date_handles_formats():
     assert _ensure_iso_date("2023-01-05") == "2023-01-05"
-    assert _ensure_iso_date("2023-01-05T12:00:00Z").startswith("2023-01-05")
+    assert _ensure_iso_date("2023-01-05T12:00:00Z") == "2023-01-05"
+    assert _ensure_iso_date("2023-01-05 23:30:00+13:00") == "2023-01-05"
+    assert _ensure_iso_date("20230105T120000") == "2023-01-05"
     today = dt.date.today().isoformat()
     assert _ensure_iso_date(None) == today
+    _parse_iso_date.cache_clear()
+    # Unparseable text falls back to today, and the failed parse is memoised too
+    assert _ensure_iso_date("yesterday evening") == today
+    assert _ensure_iso_date("yesterday evening") == today
+    info = _parse_iso_date.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_fetch_settled_transactions_prefetches_next_page(transaction_payload):
+    responses = {
+        "/accounts": [{"items": [{"_id": "acc_1", "name": "Cheque"}]}],
+        "/transactions": [
+            {"items": [{**transaction_payload, "_account": "acc_1"}], "cursor": {"next": "next-token"}},
+            {"items": [{**transaction_payload, "_id": "txn_456", "_account": "acc_1"}], "cursor": {}},
+        ],
+    }
+    session = FakeSession(responses)
+    client = AkahuClient(user_token="user", app_token="app", session=session)
+    start = dt.datetime(2023, 9, 1, 0, 0)
+    end = dt.datetime(2023, 9, 3, 0, 0)
+
+    transactions = client.fetch_settled_transactions(start_datetime=start, end_datetime=end)
+    first = next(transactions)
+    deadline = time.monotonic() + 2
+    while len(session.calls_to("/transactions")) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # The second page is requested while the first is still being consumed
+    assert first.id == "txn_123"
+    assert session.calls_to("/transactions")[1][3]["cursor"] == "next-token"
+    assert [txn.id for txn in transactions] == ["txn_456"]
+
+
+def test_fetch_settled_transactions_overlaps_account_lookup(transaction_payload):
+    responses = {
+        "/accounts": [{"items": [{"_id": "acc_1", "name": "Cheque"}]}],
+        "/transactions": [{"items": [{**transaction_payload, "_account": "acc_1"}], "cursor": {}}],
+    }
+
+    class OverlapCheckingSession(FakeSession):
+        def request(self, method, url, **kwargs):
+            if url.endswith("/accounts"):
+                deadline = time.monotonic() + 2
+                while not self.calls_to("/transactions") and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                # The first page must already be in flight while accounts load
+                assert self.calls_to("/transactions")
+            return super().request(method, url, **kwargs)
+
+    session = OverlapCheckingSession(responses)
+    client = AkahuClient(user_token="user", app_token="app", session=session)
+    fetched = list(
+        client.fetch_settled_transactions(
+            start_datetime=dt.datetime(2023, 9, 1), end_datetime=dt.datetime(2023, 9, 3)
+        )
+    )
+    assert [txn.account for txn in fetched] == ["Cheque"]
+
+
+def test_account_map_is_revalidated_with_cached_etag(tmp_path):
+    cache_path = tmp_path / "akahu_accounts.json"
+    accounts = {"items": [{"_id": "acc_1", "name": "Cheque"}]}
+    session = FakeSession({"/accounts": [FakeResponse(accounts, headers={"ETag": '"v1"'})]})
+    client = AkahuClient(user_token="user", app_token="app", session=session, cache_path=cache_path)
+    assert client._get_account_map() == {"acc_1": "Cheque"}
+    assert "If-None-Match" not in session.request_calls[0][2]
+
+    session = FakeSession({"/accounts": [FakeResponse({}, status_code=304)]})
+    client = AkahuClient(user_token="user", app_token="app", session=session, cache_path=cache_path)
+    assert client._get_account_map() == {"acc_1": "Cheque"}
+    assert session.request_calls[0][2]["If-None-Match"] == '"v1"'
+
+
+def test_account_map_cache_dropped_without_etag(tmp_path):
+    cache_path = tmp_path / "akahu_accounts.json"
+    cache_path.write_text(json.dumps({"etag": '"v1"', "accounts": {"acc_1": "Old name"}}))
+    accounts = {"items": [{"_id": "acc_1", "name": "Cheque"}]}
+    session = FakeSession({"/accounts": [accounts]})
+    client = AkahuClient(user_token="user", app_token="app", session=session, cache_path=cache_path)
+    assert client._get_account_map() == {"acc_1": "Cheque"}
+    assert not cache_path.exists()
+
+
+def test_from_payload_shares_repeated_strings(transaction_payload):
+    strings = {}
+    first = AkahuTransaction.from_payload(
+        {**transaction_payload, "description": "".join(["Count", "down"])}, source="akahu_bnz", strings=strings
+    )
+    second = AkahuTransaction.from_payload(
+        {**transaction_payload, "_id": "txn_2", "description": "".join(["Count", "down"])},
+        source="akahu_bnz",
+        strings=strings,
+    )
+    assert second.description_raw is first.description_raw
+    assert second.date is first.date
@@ -1,6 +1,22 @@
+import dataclasses
+
+import pytest
+
+import bank_sync.categoriser as categoriser_module
+from bank_sync.akahu_client import AkahuTransaction
 from bank_sync.categoriser import Categoriser
 
 
+@pytest.fixture(autouse=True, params=["re", "re2"])
+def regex_engine(request, monkeypatch):
+    """Run every categoriser test with and without the optional RE2 backend."""
+    if request.param == "re":
+        monkeypatch.setattr(categoriser_module, "re2", None)
+    elif categoriser_module.re2 is None:
+        pytest.skip("google-re2 is not installed")
+    return request.param
+
+
 def test_categoriser_applies_highest_priority_match():
     rules = [
         {"pattern": "countdown", "category": "Groceries", "priority": 50},
@@ -136,3 +152,168 @@ def test_categoriser_returns_category_type():
     category, category_type = categoriser.categorise({"merchant_normalised": "Unknown Store"})
     assert category == "Uncategorised"
     assert category_type == ""
+
+
+def test_categoriser_skips_invalid_patterns():
+    rules = [
+        {"pattern": "countdown(", "category": "Broken", "priority": 1},
+        {"pattern": "countdown", "category": "Groceries", "priority": 10},
+    ]
+    categoriser = Categoriser(rules)
+    category, _ = categoriser.categorise({"merchant_normalised": "Countdown"})
+    assert category == "Groceries"
+
+
+def test_categoriser_prefers_priority_over_match_position():
+    rules = [
+        {"pattern": "ponsonby", "category": "Local", "priority": 1},
+        {"pattern": "countdown", "category": "Groceries", "priority": 2},
+        {"pattern": "payment", "field": "description_raw", "category": "Bills", "priority": 0},
+    ]
+    categoriser = Categoriser(rules)
+    category, _ = categoriser.categorise({"merchant_normalised": "Countdown Ponsonby"})
+    assert category == "Local"
+    category, _ = categoriser.categorise(
+        {"merchant_normalised": "Countdown Ponsonby", "description_raw": "EFTPOS payment"}
+    )
+    assert category == "Bills"
+
+
+def test_categoriser_continues_after_failed_amount_condition():
+    rules = [
+        {"pattern": "uber", "category": "Big Ride", "amount_condition": "> 50", "priority": 1},
+        {"pattern": "eats", "category": "Takeaways", "priority": 2},
+        {"pattern": "(uber)\\s+\\1", "category": "Duplicate", "priority": 3},
+    ]
+    categoriser = Categoriser(rules)
+    category, _ = categoriser.categorise({"merchant_normalised": "Uber Eats", "amount": "-20"})
+    assert category == "Takeaways"
+    category, _ = categoriser.categorise({"merchant_normalised": "Uber uber", "amount": "-20"})
+    assert category == "Duplicate"
+
+
+def test_categoriser_keeps_conditional_groups_working():
+    # Fusing renumbers groups, so "(?(1)...)" must stay on its own regex
+    rules = [
+        {"pattern": "(a)?(?(1)b|c)", "category": "Conditional", "priority": 1},
+        {"pattern": "bakery", "category": "Bakery", "priority": 2},
+    ]
+    categoriser = Categoriser(rules)
+    assert categoriser.categorise({"merchant_normalised": "ab"})[0] == "Conditional"
+    assert categoriser.categorise({"merchant_normalised": "ax"})[0] == "Uncategorised"
+
+
+def test_categoriser_matches_literal_patterns_case_insensitively():
+    rules = [
+        {"pattern": "Z Energy", "category": "Fuel", "amount_condition": ">= 20", "priority": 1},
+        {"pattern": "z energy", "category": "Snacks", "priority": 2},
+        {"pattern": "st.lukes", "category": "Shopping", "priority": 3},
+    ]
+    categoriser = Categoriser(rules)
+    assert categoriser.categorise({"merchant_normalised": "Z ENERGY KARORI", "amount": "30"})[0] == "Fuel"
+    assert categoriser.categorise({"merchant_normalised": "Z ENERGY KARORI", "amount": "3"})[0] == "Snacks"
+    # "." stays a regex wildcard rather than a literal full stop
+    assert categoriser.categorise({"merchant_normalised": "Westfield St Lukes"})[0] == "Shopping"
+
+
+def test_categoriser_folds_non_ascii_text_like_re():
+    street = {"pattern": "straße", "category": "Street", "priority": 1}
+    interest = {"pattern": "interest", "category": "Interest", "priority": 2}
+    shared = Categoriser([street, interest])
+    # A lone literal rule must agree with the same rule sharing its field
+    for categoriser in (Categoriser([street]), shared):
+        assert categoriser.categorise({"merchant_normalised": "STRASSE"})[0] == "Uncategorised"
+        assert categoriser.categorise({"merchant_normalised": "STRAẞE"})[0] == "Street"
+    for categoriser in (Categoriser([interest]), shared):
+        assert categoriser.categorise({"merchant_normalised": "İnterest"})[0] == "Interest"
+
+
+def test_categoriser_accepts_akahu_transactions():
+    rules = [
+        {"pattern": "new world", "category": "Groceries", "amount_condition": "> 20", "priority": 1},
+        {"pattern": "new world", "category": "Snacks", "priority": 2},
+    ]
+    categoriser = Categoriser(rules)
+    txn = AkahuTransaction(
+        id="txn_1",
+        date="2025-11-15",
+        account="Cheque",
+        amount=-25.5,
+        balance=None,
+        description_raw="INTERNET XFR",
+        merchant_normalised="New World",
+        source="akahu_bnz",
+    )
+    assert categoriser.categorise(txn)[0] == "Groceries"
+    assert Categoriser.detect_transfer(txn) is True
+
+
+def test_categoriser_matches_numeric_fields_as_sheet_text():
+    rules = [
+        {"pattern": "^-50\\.00$", "field": "amount", "category": "Rent share", "priority": 1},
+        {"pattern": "^0\\.00$", "field": "balance", "category": "Overdrawn", "priority": 2},
+    ]
+    categoriser = Categoriser(rules)
+    txn = AkahuTransaction(
+        id="txn_1",
+        date="2025-11-15",
+        account="Cheque",
+        amount=-50.0,
+        balance=0.0,
+        description_raw="AP",
+        merchant_normalised="Flatmate",
+        source="akahu_bnz",
+    )
+    assert categoriser.categorise(txn)[0] == "Rent share"
+    assert categoriser.categorise({"amount": "-50.00"})[0] == "Rent share"
+    assert categoriser.categorise(dataclasses.replace(txn, amount=-5.0))[0] == "Overdrawn"
+
+
+def test_categoriser_keeps_unicode_classes_on_python_re(regex_engine):
+    rules = [
+        {"pattern": "caf\\w", "category": "Coffee", "priority": 1},
+        {"pattern": "bakery", "category": "Bakery", "priority": 2},
+    ]
+    categoriser = Categoriser(rules)
+    assert categoriser.categorise({"merchant_normalised": "Café Mojo"})[0] == "Coffee"
+
+
+@pytest.mark.parametrize(
+    "pattern, text",
+    [
+        # re folds the dotless "ı" to "i"; RE2 does not
+        ("ınterest", "INTEREST"),
+        # re's "$" also matches before a trailing newline; RE2's does not
+        ("foo$", "foo\n"),
+    ],
+)
+def test_categoriser_matches_like_python_re(regex_engine, pattern, text):
+    rules = [
+        {"pattern": pattern, "category": "Matched", "priority": 1},
+        {"pattern": "bakery", "category": "Bakery", "priority": 2},
+    ]
+    assert Categoriser(rules).categorise({"merchant_normalised": text})[0] == "Matched"
+
+
+def test_categoriser_memoises_repeated_transactions():
+    rules = [
+        {"pattern": "countdown", "category": "Big shop", "amount_condition": "> 100", "priority": 1},
+        {"pattern": "countdown", "category": "Groceries", "priority": 2},
+    ]
+    categoriser = Categoriser(rules)
+    assert categoriser.categorise({"merchant_normalised": "Countdown", "amount": -150})[0] == "Big shop"
+    assert categoriser.categorise({"merchant_normalised": "Countdown", "amount": "-12.50"})[0] == "Groceries"
+    assert categoriser.categorise({"merchant_normalised": "Countdown", "amount": -12.5})[0] == "Groceries"
+    info = categoriser._categorise_values.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_categoriser_reads_negated_amount_phrases():
+    rules = [
+        {"pattern": "uber", "category": "Short trip", "amount_condition": "no more than NZ$20", "priority": 1},
+        {"pattern": "uber", "category": "Long trip", "amount_condition": "no less than 1,000 dollars", "priority": 2},
+    ]
+    categoriser = Categoriser(rules)
+    assert categoriser.categorise({"merchant_normalised": "Uber", "amount": -20})[0] == "Short trip"
+    assert categoriser.categorise({"merchant_normalised": "Uber", "amount": -35})[0] == "Uncategorised"
+    assert categoriser.categorise({"merchant_normalised": "Uber", "amount": -1000})[0] == "Long trip"
@@ -45,3 +45,49 @@ def test_ignore_rule_defaults_field_and_is_case_insensitive():
     ])
     assert should_ignore(_txn(description_raw="Tiny adjustment"), rules) is True
     assert should_ignore(_txn(description_raw="Major payment"), rules) is False
+
+
+def test_ignore_rule_set_checks_other_rules_when_amount_bounds_fail():
+    rules = build_ignore_rules(
+        [
+            {"pattern": "interest", "max_amount": 1},
+            {"pattern": "adjustment", "min_amount": 2},
+            {"pattern": "bnz", "field": "merchant_normalised", "max_amount": -100},
+        ]
+    )
+    assert len(rules) == 3
+    # "interest" matches first but fails its bound; "adjustment" still applies.
+    assert should_ignore(_txn(amount=5.0), rules) is True
+    assert should_ignore(_txn(amount=1.5), rules) is False
+    assert should_ignore(_txn(amount=-200.0, description_raw="Salary"), rules) is True
+
+
+def test_should_ignore_accepts_plain_rule_lists():
+    rules = list(build_ignore_rules([{"pattern": "fee"}, {"pattern": "interest"}]))
+    assert should_ignore(_txn(description_raw="Account fee"), rules) is True
+    assert should_ignore(_txn(description_raw="Groceries"), rules) is False
+
+
+def test_ignore_rule_literal_prefilter_keeps_case_insensitive_matches():
+    rules = build_ignore_rules([{"pattern": "uber\\s+eats"}, {"pattern": "interest"}])
+    assert rules[0]._required_literal == "uber"
+    assert should_ignore(_txn(description_raw="UBER   EATS"), rules) is True
+    # re.IGNORECASE treats "ı" and "İ" as "i", which casefold() does not, so
+    # non-ASCII text must skip the prefilter.
+    for text in ("ınterest", "İnterest"):
+        assert should_ignore(_txn(description_raw=text), rules) is True
+        assert should_ignore(_txn(description_raw=text), list(rules)) is True
+    assert should_ignore(_txn(description_raw="Uber trip"), rules) is False
+    assert should_ignore(_txn(description_raw="Uber trip"), list(rules)) is False
+
+
+def test_ignore_rules_keep_conditional_groups_working():
+    rules = build_ignore_rules([{"pattern": "(a)?(?(1)b|c)"}, {"pattern": "fee"}])
+    assert should_ignore(_txn(description_raw="ab"), rules) is True
+    assert should_ignore(_txn(description_raw="ax"), rules) is False
+
+
+def test_ignore_rules_match_amounts_as_sheet_text():
+    rules = build_ignore_rules([{"field": "amount", "pattern": "^-50\\.00$"}])
+    assert should_ignore(_txn(amount=-50.0), rules) is True
+    assert should_ignore(_txn(amount=-50.5), rules) is False
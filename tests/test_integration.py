@@ -185,7 +185,7 @@ def test_recategorization_updates_existing_transactions():
     new_row[8] = new_category_type
     
     # Should detect that update is needed
-    assert _needs_update(existing_data, new_row) is True
+    assert _needs_update(tuple(existing_data.values()), new_row) is True
     assert new_row[7] == "Groceries"
     assert new_row[8] == "E"
 
@@ -318,7 +318,7 @@ def test_transaction_deduplication_by_id():
     ]
     
     # Should detect that update is needed due to balance change
-    assert _needs_update(existing_data, new_row) is True
+    assert _needs_update(tuple(existing_data.values()), new_row) is True
 
 
 def test_lookback_buffer_calculation():
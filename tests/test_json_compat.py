@@ -0,0 +1,24 @@
+import pytest
+
+from bank_sync import json_compat
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_loads_decodes_bytes_and_text(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_compat, "orjson", None)
+    elif json_compat.orjson is None:
+        pytest.skip("orjson is not installed")
+    assert json_compat.loads(b'{"items": [1, 2]}') == {"items": [1, 2]}
+    assert json_compat.loads('{"name": "Cheque"}') == {"name": "Cheque"}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_round_trips_and_indents(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_compat, "orjson", None)
+    elif json_compat.orjson is None:
+        pytest.skip("orjson is not installed")
+    payload = {"last_synced_at": "2023-09-01T00:00:00+00:00", "name": "Café"}
+    assert json_compat.loads(json_compat.dumps(payload)) == payload
+    assert json_compat.dumps({"a": 1}, indent=True) == b'{\n  "a": 1\n}'
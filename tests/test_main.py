@@ -1,5 +1,87 @@
-from bank_sync.main import _format_mutation_summary, _needs_update, load_config
-from bank_sync.sheets_client import TRANSACTION_HEADERS
+import json
+
+import bank_sync.main as main_module
+from bank_sync.akahu_client import AkahuTransaction
+from bank_sync.main import _format_mutation_summary, _needs_update, _rows_digest, load_config, run_sync, upload_categories
+from bank_sync.sheets_client import HEADER_INDEX, TRANSACTION_HEADERS
+
+
+class FakeSheetsClient:
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.appended = []
+        self.updated = []
+        self.deleted = []
+        FakeSheetsClient.instances.append(self)
+
+    def fetch_transactions(self, *, use_cache=False):
+        return list(self.iter_transactions())
+
+    def iter_transactions(self):
+        return iter(())
+
+    def fetch_transactions_and_rules(self):
+        return self.iter_transactions(), [{"pattern": "cafe", "category": "Coffee", "priority": 1}]
+
+    def append_transactions(self, rows):
+        self.appended.append(list(rows))
+
+    def upload_category_rules(self, rows):
+        self.uploaded = rows
+
+    def flush(self, *, new_rows=(), updates=(), rows_to_delete=()):
+        if new_rows:
+            self.appended.append(list(new_rows))
+        if updates:
+            self.updated.append(list(updates))
+        if rows_to_delete:
+            self.deleted.append(list(rows_to_delete))
+
+
+class FakeAkahuClient:
+    transactions = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def fetch_settled_transactions(self, start_datetime, end_datetime):
+        yield from self.transactions
+
+
+def _akahu_txn(index):
+    return AkahuTransaction(
+        id=f"txn_{index}",
+        date="2024-01-01",
+        account="Main",
+        amount=-4.5,
+        balance=None,
+        description_raw="Cafe",
+        merchant_normalised="Cafe",
+        source="akahu_bnz",
+    )
+
+
+def _configure_sync(tmp_path, monkeypatch, transactions):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "spreadsheet_id": "sheet",
+                "google_service_file": "creds.json",
+                "akahu_user_token": "user",
+                "akahu_app_token": "app",
+                "state_file": str(tmp_path / "state.json"),
+                "update_dashboard": False,
+            }
+        )
+    )
+    monkeypatch.setenv("SYNC_CONFIG", str(config_path))
+    monkeypatch.delenv("GOOGLE_APPLICATION_CREDENTIALS", raising=False)
+    monkeypatch.setattr(main_module, "SheetsClient", FakeSheetsClient)
+    monkeypatch.setattr(main_module, "AkahuClient", FakeAkahuClient)
+    monkeypatch.setattr(FakeAkahuClient, "transactions", transactions)
+    FakeSheetsClient.instances = []
 
 
 def test_load_config_reads_file(tmp_path):
@@ -19,7 +101,7 @@ def test_load_config_defaults_deletion_threshold(tmp_path):
 
 
 def test_needs_update_detects_differences():
-    existing = dict(zip(TRANSACTION_HEADERS, ["a"] * len(TRANSACTION_HEADERS)))
+    existing = tuple(["a"] * len(TRANSACTION_HEADERS))
     new_row = ["a"] * len(TRANSACTION_HEADERS)
     assert _needs_update(existing, new_row) is False
     new_row[3] = "different"
@@ -35,3 +117,67 @@ def test_format_mutation_summary_reports_actions():
 
 def test_format_mutation_summary_handles_noops():
     assert _format_mutation_summary([], [], []) == ["no sheet mutations are required"]
+
+
+def test_load_config_reloads_after_file_changes(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text('{"key": 1}')
+    assert load_config(path) is load_config(path)
+    path.write_text('{"key": 22}')
+    assert load_config(path) == {"key": 22}
+
+
+def test_run_sync_appends_new_rows_in_batches(tmp_path, monkeypatch):
+    _configure_sync(tmp_path, monkeypatch, [_akahu_txn(index) for index in range(5)])
+    monkeypatch.setattr(main_module, "_APPEND_BATCH_SIZE", 2)
+    run_sync()
+    (sheets,) = FakeSheetsClient.instances
+    assert [len(batch) for batch in sheets.appended] == [2, 2, 1]
+    assert sheets.appended[0][0][HEADER_INDEX["category"]] == "Coffee"
+    assert (tmp_path / "state.json").exists()
+
+
+def test_run_sync_dry_run_writes_nothing(tmp_path, monkeypatch):
+    _configure_sync(tmp_path, monkeypatch, [_akahu_txn(index) for index in range(5)])
+    monkeypatch.setattr(main_module, "_APPEND_BATCH_SIZE", 2)
+    run_sync(dry_run=True)
+    (sheets,) = FakeSheetsClient.instances
+    assert sheets.appended == []
+    assert not (tmp_path / "state.json").exists()
+
+
+def test_upload_categories_skips_unchanged_csv(tmp_path, monkeypatch):
+    _configure_sync(tmp_path, monkeypatch, [])
+    csv_path = tmp_path / "CategoryMap.csv"
+    csv_path.write_text("pattern,field\ncafe,merchant_normalised\n")
+
+    upload_categories(str(csv_path))
+    upload_categories(str(csv_path))
+    assert len(FakeSheetsClient.instances) == 1
+    upload_categories(str(csv_path), force=True)
+    assert len(FakeSheetsClient.instances) == 2
+
+    csv_path.write_text("pattern,field\nbakery,merchant_normalised\n")
+    upload_categories(str(csv_path))
+    assert FakeSheetsClient.instances[-1].uploaded[1] == ["bakery", "merchant_normalised"]
+
+
+def test_upload_categories_reuploads_when_target_tab_changes(tmp_path, monkeypatch):
+    _configure_sync(tmp_path, monkeypatch, [])
+    csv_path = tmp_path / "CategoryMap.csv"
+    csv_path.write_text("pattern,field\ncafe,merchant_normalised\n")
+    upload_categories(str(csv_path))
+
+    config_path = tmp_path / "config.json"
+    config = json.loads(config_path.read_text())
+    config_path.write_text(json.dumps({**config, "category_map_tab": "Rules"}))
+    upload_categories(str(csv_path))
+    assert len(FakeSheetsClient.instances) == 2
+    config_path.write_text(json.dumps({**config, "category_map_tab": "Rules", "spreadsheet_id": "other"}))
+    upload_categories(str(csv_path))
+    assert len(FakeSheetsClient.instances) == 3
+
+
+def test_rows_digest_keeps_cell_boundaries():
+    assert _rows_digest([["a\x1fb"]]) != _rows_digest([["a", "b"]])
+    assert _rows_digest([["a\x1eb"]]) != _rows_digest([["a"], ["b"]])
@@ -1,6 +1,6 @@
 import pytest
 
-from bank_sync.reconciliation import ReconciliationResult, _latest_balance, reconcile
+from bank_sync.reconciliation import ReconciliationResult, reconcile
 
 
 def test_reconcile_groups_by_account():
@@ -16,9 +16,30 @@ def test_reconcile_groups_by_account():
     assert result_map["Savings"].difference == pytest.approx(49)
 
 
-def test_latest_balance_returns_zero_when_missing():
+def test_reconcile_expects_zero_when_balance_missing():
     transactions = [
-        {"balance": "", "date": "2023-01-01"},
-        {"balance": "not-a-number", "date": "2023-01-02"},
+        {"account": "Cheque", "amount": "0", "balance": "", "date": "2023-01-01"},
+        {"account": "Cheque", "amount": "0", "balance": "not-a-number", "date": "2023-01-02"},
     ]
-    assert _latest_balance(transactions) == 0.0
+    (result,) = reconcile(transactions)
+    assert result.expected_balance == 0.0
+
+
+def test_reconcile_uses_latest_dated_balance_regardless_of_order():
+    transactions = [
+        {"account": "Cheque", "amount": "-5", "balance": "95", "date": "2023-09-03"},
+        {"account": "Cheque", "amount": "100", "balance": "100", "date": "2023-09-01"},
+        {"account": "Cheque", "amount": "-1", "balance": "oops", "date": "2023-09-04"},
+    ]
+    (result,) = reconcile(transactions)
+    assert result.expected_balance == pytest.approx(95)
+    assert result.sheet_balance == pytest.approx(94)
+    assert result.difference == pytest.approx(1)
+
+
+def test_reconcile_sums_amounts_without_float_drift():
+    transactions = [{"account": "Cheque", "amount": "0.10", "balance": "", "date": "2023-09-01"}] * 1000
+    transactions.append({"account": "Cheque", "amount": "-0.30", "balance": "99.70", "date": "2023-09-02"})
+    (result,) = reconcile(transactions)
+    assert result.sheet_balance == 99.7
+    assert result.difference == 0
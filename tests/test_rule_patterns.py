@@ -0,0 +1,33 @@
+import pytest
+
+from bank_sync.rule_patterns import field_text, fuse_patterns, has_group_references
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("(uber)\\s+\\1", True),
+        ("(?P<name>a)(?P=name)", True),
+        ("(a)?(?(1)b|c)", True),
+        ("(?:(a)|b)(?(1)x)", True),
+        ("(", True),
+        ("(a|b)+c", False),
+        ("[\x0c-z]x", False),
+    ],
+)
+def test_has_group_references(pattern, expected):
+    assert has_group_references(pattern) is expected
+
+
+def test_fuse_patterns_names_groups_by_key():
+    fused = fuse_patterns([(3, "bakery"), (7, "cafe")])
+    assert fused.search("Cafe then bakery").lastgroup == "r7"
+    ordered = fuse_patterns([(3, "bakery"), (7, "cafe")], in_order=True)
+    assert ordered.match("Cafe then bakery").lastgroup == "r3"
+    assert fuse_patterns([(1, "(a)\\1"), (2, "b")]) is None
+
+
+def test_field_text_formats_numbers_like_sheet_rows():
+    assert field_text({"amount": -50.0, "balance": None}, "amount") == "-50.00"
+    assert field_text({"amount": -50.0, "balance": None}, "balance") == ""
+    assert field_text(object(), "merchant_normalised") == ""
@@ -1,3 +1,5 @@
+import copy
+import pickle
 from typing import Any, Dict, List
 
 import pytest
@@ -6,13 +8,11 @@ import bank_sync.sheets_client as sc
 
 
 class FakeRequest:
-    def __init__(self, response: Dict[str, Any] | None = None, callback=None):
+    def __init__(self, response: Dict[str, Any] | None = None):
         self._response = response or {}
-        self._callback = callback
 
-    def execute(self):
-        if self._callback:
-            self._callback()
+    def execute(self, num_retries=0):
+        self.num_retries = num_retries
         return self._response
 
 
@@ -20,23 +20,35 @@ class FakeValuesResource:
     def __init__(self, service: "FakeSheetsService"):
         self._service = service
 
-    def get(self, spreadsheetId: str, range: str):
+    def get(self, spreadsheetId: str, range: str, fields: str | None = None):
         self._service.calls.append(("get", range))
+        self._service.last_fields = fields
         if not self._service.get_responses:
             raise AssertionError("No fake response configured")
-        return FakeRequest(self._service.get_responses.pop(0))
+        self._service.last_get_request = FakeRequest(self._service.get_responses.pop(0))
+        return self._service.last_get_request
 
-    def append(self, spreadsheetId: str, range: str, valueInputOption: str, body: Dict):
-        def record():
-            self._service.append_calls.append((range, valueInputOption, body))
+    def batchGet(self, spreadsheetId: str, ranges: List[str], fields: str | None = None):
+        self._service.calls.append(("batchGet", tuple(ranges)))
+        self._service.last_fields = fields
+        if len(self._service.get_responses) < len(ranges):
+            raise AssertionError("No fake response configured")
+        value_ranges = [self._service.get_responses.pop(0) for _ in ranges]
+        return FakeRequest({"valueRanges": value_ranges})
 
-        return FakeRequest(callback=record)
+    # Write calls are recorded when the request is built; the client always
+    # executes immediately, so this matches recording on execute()
+    def append(self, spreadsheetId: str, range: str, valueInputOption: str, body: Dict):
+        self._service.append_calls.append((range, valueInputOption, body))
+        return self._service.write_request("values.append", self._service.append_response)
 
     def update(self, spreadsheetId: str, range: str, valueInputOption: str, body: Dict):
-        def record():
-            self._service.update_calls.append((range, valueInputOption, body))
+        self._service.update_calls.append((range, valueInputOption, body))
+        return self._service.write_request("values.update")
 
-        return FakeRequest(callback=record)
+    def batchUpdate(self, spreadsheetId: str, body: Dict):
+        self._service.values_batch_update_calls.append(body)
+        return self._service.write_request("values.batchUpdate")
 
 
 class FakeSpreadsheetsResource:
@@ -47,7 +59,8 @@ class FakeSpreadsheetsResource:
     def values(self):
         return self._values
 
-    def get(self, spreadsheetId: str):
+    def get(self, spreadsheetId: str, fields: str | None = None):
+        self._service.calls.append(("metadata", fields))
         # Return mock metadata with sheet IDs
         metadata = {
             "sheets": [
@@ -58,21 +71,27 @@ class FakeSpreadsheetsResource:
         return FakeRequest(response=metadata)
 
     def batchUpdate(self, spreadsheetId: str, body: Dict):
-        def record():
-            self._service.batch_update_calls.append(body)
-
-        return FakeRequest(callback=record)
+        self._service.batch_update_calls.append(body)
+        return self._service.write_request("batchUpdate")
 
 
 class FakeSheetsService:
     def __init__(self, get_responses: List[Dict[str, Any]] | None = None):
         self.calls: List = []
         self.append_calls: List = []
+        self.append_response: Dict[str, Any] = {}
         self.update_calls: List = []
         self.batch_update_calls: List = []
+        self.values_batch_update_calls: List = []
         self.get_responses = list(get_responses or [])
+        # Last request built for each write method, to inspect how it was executed
+        self.write_requests: Dict[str, FakeRequest] = {}
         self._spreadsheets = FakeSpreadsheetsResource(self)
 
+    def write_request(self, method: str, response: Dict[str, Any] | None = None) -> FakeRequest:
+        self.write_requests[method] = FakeRequest(response)
+        return self.write_requests[method]
+
     def spreadsheets(self):
         return self._spreadsheets
 
@@ -98,6 +117,14 @@ def test_fetch_transactions_pads_rows(patch_build):
     assert txns[1].data["merchant_normalised"] == ""
 
 
+def test_iter_transactions_yields_rows_with_sheet_indices(patch_build):
+    patch_build.get_responses = [{"values": [["id1"], ["id2"]]}]
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    rows = client.iter_transactions()
+    assert patch_build.calls == []
+    assert [(txn.id, txn.row_index) for txn in rows] == [("id1", 2), ("id2", 3)]
+
+
 def test_fetch_category_rules_applies_defaults(patch_build):
     patch_build.get_responses = [
         {"values": [["pattern", "", "", "", ""], ["", "desc", "Cat", "5", "<=10"]]},
@@ -129,3 +156,138 @@ def test_append_update_and_delete(patch_build):
     delete_body = patch_build.batch_update_calls[0]["requests"]
     indices = [req["deleteDimension"]["range"]["startIndex"] for req in delete_body]
     assert indices == [4, 2]
+
+
+def test_batch_update_transactions_uses_single_request(patch_build):
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    row = ["a"] * len(sc.TRANSACTION_HEADERS)
+    client.batch_update_transactions([(5, row), (9, row)])
+
+    assert patch_build.update_calls == []
+    assert len(patch_build.values_batch_update_calls) == 1
+    body = patch_build.values_batch_update_calls[0]
+    assert body["valueInputOption"] == "USER_ENTERED"
+    assert [item["range"] for item in body["data"]] == ["Transactions!A5:L5", "Transactions!A9:L9"]
+
+
+def test_delete_rows_merges_contiguous_rows(patch_build):
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    client.delete_rows([5, 4, 3, 9, 8, 12])
+
+    delete_body = patch_build.batch_update_calls[0]["requests"]
+    ranges = [
+        (req["deleteDimension"]["range"]["startIndex"], req["deleteDimension"]["range"]["endIndex"])
+        for req in delete_body
+    ]
+    assert ranges == [(11, 12), (7, 9), (2, 5)]
+
+
+def test_flush_batches_updates_and_appends_new_rows(patch_build):
+    patch_build.get_responses = [{"values": [["id1"], ["id2"], ["id3"]]}]
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    client.fetch_transactions()
+    row = ["a"] * len(sc.TRANSACTION_HEADERS)
+    client.flush(new_rows=[row, row], updates=[(3, row), (4, row)], rows_to_delete=[2])
+
+    (body,) = patch_build.values_batch_update_calls
+    assert [item["range"] for item in body["data"]] == ["Transactions!A3:L3", "Transactions!A4:L4"]
+    # New rows always go through values.append, which grows the grid as needed
+    (append_call,) = patch_build.append_calls
+    assert append_call[0] == "Transactions!A:L"
+    assert append_call[2]["values"] == [row, row]
+    (delete_body,) = patch_build.batch_update_calls
+    assert delete_body["requests"][0]["deleteDimension"]["range"]["startIndex"] == 1
+
+
+def test_flush_without_updates_skips_values_batch_update(patch_build):
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    client.flush(new_rows=[["id1"]])
+    assert len(patch_build.append_calls) == 1
+    assert patch_build.values_batch_update_calls == []
+
+
+def test_requests_are_executed_with_retries(patch_build):
+    patch_build.get_responses = [{"values": []}, {"values": []}]
+    sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json").fetch_category_rules()
+    assert patch_build.last_get_request.num_retries == 5
+    assert patch_build.last_fields == "values"
+    sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json", num_retries=0).fetch_category_rules()
+    assert patch_build.last_get_request.num_retries == 0
+
+
+def test_only_repeatable_writes_are_retried(patch_build):
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    row = ["a"] * len(sc.TRANSACTION_HEADERS)
+    client.update_transaction(2, row)
+    client.flush(new_rows=[row], updates=[(3, row)], rows_to_delete=[4])
+    retries = {method: request.num_retries for method, request in patch_build.write_requests.items()}
+    assert retries == {"values.update": 5, "values.batchUpdate": 5, "values.append": 0, "batchUpdate": 0}
+
+
+def test_fetch_transactions_cache_mirrors_own_writes(patch_build):
+    patch_build.get_responses = [{"values": [["id1"], ["id2"], ["id3"], ["id4"]]}]
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    client.fetch_transactions()
+    patch_build.append_response = {"updates": {"updatedRange": "Transactions!A6:L6"}}
+    updated = ["id2", "2024-01-02"] + [""] * (len(sc.TRANSACTION_HEADERS) - 2)
+    client.flush(new_rows=[["id5"]], updates=[(3, updated)], rows_to_delete=[2, 5])
+
+    txns = client.fetch_transactions(use_cache=True)
+    assert [(txn.id, txn.row_index) for txn in txns] == [("id2", 2), ("id3", 3), ("id5", 4)]
+    assert txns[0].data["date"] == "2024-01-02"
+    assert len(txns[2].values) == len(sc.TRANSACTION_HEADERS)
+    assert [call[0] for call in patch_build.calls] == ["get", "metadata"]
+
+
+def test_fetch_transactions_cache_needs_a_complete_read(patch_build):
+    patch_build.get_responses = [{"values": [["id1"], ["id2"]]}, {"values": [["id1"]]}]
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    next(client.iter_transactions())
+    assert [txn.id for txn in client.fetch_transactions(use_cache=True)] == ["id1"]
+    assert len(patch_build.calls) == 2
+
+
+def test_fetch_transactions_and_rules_uses_one_request(patch_build):
+    patch_build.get_responses = [{"values": [["id1", "2023-09-01"]]}, {}]
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    transactions, rules = client.fetch_transactions_and_rules()
+    assert [txn.data["date"] for txn in transactions] == ["2023-09-01"]
+    assert rules == []
+    assert patch_build.calls == [("batchGet", ("Transactions!A2:L", "CategoryMap!A2:F"))]
+    assert [txn.id for txn in client.fetch_transactions(use_cache=True)] == ["id1"]
+
+
+def test_sheet_transaction_exposes_columns_as_attributes(patch_build):
+    patch_build.get_responses = [{"values": [["id1", "2023-09-01", "Cheque", "-4.50"]]}]
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    (txn,) = client.fetch_transactions()
+    assert (txn.id, txn.date, txn.amount, txn.category) == ("id1", "2023-09-01", "-4.50", "")
+    assert txn.data["account"] == "Cheque"
+    with pytest.raises(AttributeError):
+        getattr(txn, "not_a_column")
+
+
+def test_sheet_transaction_can_be_copied_and_pickled(patch_build):
+    txn = sc.SheetTransaction(values=sc._padded(["id1", "2023-09-01"]), row_index=2)
+    for clone in (copy.copy(txn), copy.deepcopy(txn), pickle.loads(pickle.dumps(txn))):
+        assert clone == txn
+        assert clone.date == "2023-09-01"
+
+
+def test_sheet_ids_are_fetched_once_with_a_field_mask(patch_build):
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    client.delete_rows([3])
+    client.delete_rows([2])
+    assert patch_build.calls == [("metadata", "sheets.properties(sheetId,title)")]
+
+
+def test_delete_rows_ignores_duplicate_indices(patch_build):
+    client = sc.SheetsClient(spreadsheet_id="sheet", credentials_path="creds.json")
+    client.delete_rows([5, 5, 4, 9, 9])
+
+    delete_body = patch_build.batch_update_calls[0]["requests"]
+    ranges = [
+        (req["deleteDimension"]["range"]["startIndex"], req["deleteDimension"]["range"]["endIndex"])
+        for req in delete_body
+    ]
+    assert ranges == [(8, 9), (3, 5)]
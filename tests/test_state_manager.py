@@ -1,5 +1,10 @@
+import os
+import stat
 from datetime import datetime, timezone
 
+import pytest
+
+from bank_sync import state_manager
 from bank_sync.state_manager import SyncState
 
 
@@ -16,3 +21,41 @@ def test_sync_state_save_and_load(tmp_path):
 
     loaded = SyncState.load(path)
     assert loaded.last_synced_at == datetime(2023, 9, 1, tzinfo=timezone.utc)
+
+
+def test_sync_state_load_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text('{"last_synced_at": ')
+    assert SyncState.load(path).last_synced_at is None
+
+
+def test_sync_state_save_replaces_existing_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text('{"last_synced_at": null}')
+    SyncState(last_synced_at=datetime(2023, 9, 2, tzinfo=timezone.utc)).save(path)
+    assert SyncState.load(path).last_synced_at == datetime(2023, 9, 2, tzinfo=timezone.utc)
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_sync_state_save_keeps_file_mode(tmp_path):
+    path = tmp_path / "state.json"
+    SyncState().save(path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    os.chmod(path, 0o640)
+    SyncState().save(path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_write_atomic_cleans_up_after_failed_write(tmp_path):
+    with pytest.raises(TypeError):
+        # A str can't be written to the binary temporary file
+        state_manager._write_atomic(tmp_path / "state.json", "not bytes")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sync_state_keeps_category_digest_without_sync_time(tmp_path):
+    path = tmp_path / "state.json"
+    SyncState(category_rules_digest="abc123").save(path)
+    loaded = SyncState.load(path)
+    assert loaded.category_rules_digest == "abc123"
+    assert loaded.last_synced_at is None